@@ -0,0 +1,150 @@
+from argparse import Namespace
+from ast import Import
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+from time import time
+
+from run import build_parser, read_configs, run_file, set_cache, to_results, write_summary
+from util.context_slicer import ModuleIndex
+from util.filesys import make_directory
+from util.journal import Journal
+from util.logger import Logger, LoggerName
+from util.workspace import Workspace
+
+
+# 일괄 실행 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Tool)
+
+
+# 일괄 실행 초기 값 열거형 클래스.
+class Default(Enum):
+  Exclude_Files = ("test_*.py", "*_test.py", "conftest.py", "setup.py")
+  Exclude_Dirs = ("test", "tests", "venv", ".venv", ".git", "__pycache__", "build", "dist")
+  Glob_Chars = "*?["
+
+
+# 입력 인자를 파싱합니다. -s는 코드 파일, 폴더, glob 패턴 리스트입니다.
+def parse_arguments() -> Namespace:
+  parser = build_parser()
+  parser.description = "Generate test cases for every module found in the given files, directories, and globs."
+  parser.add_argument("-x", "--exclude", metavar="EXCLUDE_PATTERNS", type=str,
+                      default=[], nargs='+',
+                      help="excluded file name glob patterns")
+  return parser.parse_args()
+
+
+# 코드 파일, 폴더, glob 패턴 리스트 paths에서 찾은 Python 코드 파일의 현재 경로 기준 상대 경로 리스트를 반환합니다.
+# 테스트, 가상 환경 폴더와 excludes 패턴에 맞는 파일은 제외합니다.
+# 출력 경로와 모듈 이름은 현재 경로 기준이므로 현재 경로 밖의 경로가 있으면 ValueError를 발생시킵니다.
+def discover(paths: list[Path], excludes: list[str]) -> list[Path]:
+  patterns = Default.Exclude_Files.value + tuple(excludes)
+  cwd, found = Path.cwd().resolve(), []
+  for path in paths:
+    try:
+      path = path.resolve().relative_to(cwd)
+    except ValueError:
+      raise ValueError(f"{path} is outside the current directory {cwd}: run from a directory that contains it")
+
+    if path.is_dir():
+      candidates = sorted(path.rglob("*.py"))
+    elif any(char in str(path) for char in Default.Glob_Chars.value):
+      candidates = sorted(Path().glob(str(path)))
+    else:
+      candidates = [path]
+
+    for candidate in candidates:
+      if candidate.suffix != ".py" or candidate in found: continue
+      if any(part in Default.Exclude_Dirs.value for part in candidate.parts[:-1]): continue
+      if any(candidate.match(pattern) for pattern in patterns): continue
+      found.append(candidate)
+  return found
+
+
+# 코드 파일 경로 path의 모듈 이름을 반환합니다.
+def _to_module(path: Path) -> str:
+  parts = list(path.with_suffix("").parts)
+  if parts and parts[-1] == "__init__": parts.pop()
+  return ".".join(parts)
+
+
+# 코드 파일 경로 path가 import하는 모듈 중 모듈 이름, 경로 dict modules에 있는 경로 리스트를 반환합니다.
+def find_references(path: Path, modules: dict) -> list[Path]:
+  try:
+    nodes = sorted(set(ModuleIndex.get(path).imports.values()), key=lambda node: node.lineno)
+  except (SyntaxError, OSError):
+    return []
+
+  module, references = _to_module(path), []
+  for node in nodes:
+    if isinstance(node, Import):
+      names = [alias.name for alias in node.names]
+    else:
+      # 상대 import는 현재 패키지 기준으로 변환.
+      base = node.module or ""
+      if node.level:
+        package = module.split(".") if path.stem == "__init__" else module.split(".")[:-1]
+        package = package[:len(package) - node.level + 1]
+        base = ".".join(package + ([base] if base else []))
+      names = [base] + [f"{base}.{alias.name}" for alias in node.names]
+
+    for name in names:
+      ref = modules.get(name)
+      if ref and ref != path and ref not in references:
+        references.append(ref)
+  return references
+
+
+def main():
+
+  # 파싱한 인자 연결.
+  args = parse_arguments()
+  res = dict(item.split(":", 1) for item in args.res if ":" in item)
+  out = args.out
+
+  # LLM 응답 캐시, 작업 기록 설정. 작업 기록이 있으면 완료한 작업은 다시 수행하지 않음.
+  cache = set_cache(args)
+  journal = Journal(args.journal) if args.journal else None
+  Workspace.configure(args.workspace, args.workspace_retain)
+  configs = read_configs(args)
+
+  start_time = time()
+  make_directory(out)
+
+  # 모듈 탐색 및 공유 색인 구성. 현재 경로 밖의 경로는 거부.
+  try:
+    paths = discover(args.src, args.exclude)
+  except ValueError as e:
+    logger.error(e)
+    return
+  modules = {_to_module(path): path for path in paths}
+  logger.info(f"{len(paths)} modules found")
+
+  # 파일마다 오류 줄 탐지, 함수마다 테스트케이스 생성. 함수 생성은 모든 파일이 하나의 스레드 풀을 공유.
+  def process(path: Path) -> dict:
+    src = [path] + find_references(path, modules)
+    try:
+      responses, carried = run_file(src, args.fcts, res, args, configs, out/path.with_suffix(""), generators, journal)
+    except Exception as e:
+      logger.exception(f"{path} test generation failed")
+      return {"results": [], "error": str(e)}
+    logger.info(f"{path}: {sum(r.success for r in responses)}/{len(responses)} functions succeeded")
+    return {"results": to_results(responses, carried)}
+
+  workers = max(1, args.jobs)
+  with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate") as generators:
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file") as files:
+      futures = {path: files.submit(process, path) for path in paths}
+      results = {str(path): future.result() for path, future in futures.items()}
+
+  # 전체 요약 출력.
+  succeeded = sum(r["success"] for file in results.values() for r in file["results"])
+  functions = sum(len(file["results"]) for file in results.values())
+  failed = [path for path, file in results.items() if "error" in file]
+  logger.info(f"{len(paths)} modules ({len(failed)} failed): {succeeded}/{functions} functions succeeded")
+  write_summary(out, {"elapsed": round(time() - start_time, 3), "modules": len(paths), "failed_modules": failed,
+                      "files": results}, cache, journal, args.prometheus)
+
+
+if __name__ == "__main__":
+  main()
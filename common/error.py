@@ -40,7 +40,7 @@ class Error(Element):
 
       # 인터프리터 실행 실패
       if exitcode > 1:
-        collectors = inp.get("collectors", [])
+        collectors = [collector for collector in inp.get("collectors", []) if collector.get("longrepr")]
         longrepr = collectors[-1].get("longrepr", "")
 
         error_line = longrepr.split("\n")[-1].lstrip("E ")
@@ -73,7 +73,7 @@ class Error(Element):
             results.append(Error(type, message, path, fct, code, lineno))
         return results
       
-    except (TypeError or ValueError):
+    except (TypeError, ValueError, IndexError):
       logger.warning("error convertion failed: input is not dict")
       return []
 
@@ -42,6 +42,12 @@ class Function(Element):
       return []
   
 
+  # to_dict로 변환한 dict 입력 inp를 함수로 변환합니다. 테스트 결과는 복원하지 않습니다.
+  @staticmethod
+  def from_dict(inp: dict) -> Function:
+    return Function(name=inp.get("name", ""), param=inp.get("param", ""), code=inp.get("code", ""))
+  
+
   # code에서 코드를 포함한 함수 정의문을 없애고 함수 밖의 코드를 제거한 코드를 반환합니다.
   @staticmethod
   def _normalize_code(code: str) -> str:
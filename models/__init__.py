@@ -1,8 +1,14 @@
 from enum import Enum
 
-# 레지스트리 모듈 등록
-from models.openai.response import Response
+from models.model import ModelFactory
+
+# 레지스트리 모듈 등록. 모듈은 모델을 처음 생성할 때 불러옴.
+ModelFactory.register_module("response", "models.openai.response")
+ModelFactory.register_module("async_response", "models.openai.async_response")
+ModelFactory.register_module("simulator", "models.simulator.simulator")
 
 # 레지스트리 이름 등록
 class Available_Model(Enum):
-  Response = "response"
\ No newline at end of file
+  Response = "response"
+  Async_Response = "async_response"
+  Simulator = "simulator"
\ No newline at end of file
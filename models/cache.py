@@ -0,0 +1,224 @@
+from enum import Enum
+from hashlib import sha256
+from json import dumps, loads
+from pathlib import Path
+from sqlite3 import connect
+from threading import Lock
+from time import time
+from typing_extensions import Any, Iterator, override
+
+from models.model import Model, Session
+from util.filesys import make_directory
+from util.logger import Logger, LoggerName
+
+
+# LLM 응답 캐시 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# LLM 응답 캐시 초기 값 열거형 클래스.
+class Default(Enum):
+  Path = Path(".cache/responses.db")
+  Max_Size = 512 * 1024 * 1024
+  Max_Age = 30 * 24 * 60 * 60
+
+
+# LLM 응답 캐시 요청 클래스.
+class CacheRequest:
+  def __init__(self, key: str, inps: list[str], entry=None, req=None):
+    self.key = key
+    self.inputs = inps
+    self.entry = entry
+    self.request = req
+
+
+# SQLite 파일에 LLM 응답을 기록하는 캐시 클래스.
+# 크기 max_size 바이트, 최근 사용 후 max_age초를 넘는 기록은 오래 사용하지 않은 순서로 제거합니다.
+class ResponseCache:
+
+  def __init__(self, path=Default.Path.value, max_size=Default.Max_Size.value,
+               max_age=Default.Max_Age.value, bypass=False):
+    self.path = Path(path)
+    self.max_size = max_size
+    self.max_age = max_age
+    self.bypass = bypass
+    self.hits = 0
+    self.misses = 0
+    self.lock = Lock()
+
+    make_directory(self.path.parent)
+    self.connection = connect(self.path, check_same_thread=False)
+    self.connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                            "key TEXT PRIMARY KEY, output TEXT, state TEXT, "
+                            "size INTEGER, created REAL, accessed REAL)")
+    self.connection.execute("CREATE INDEX IF NOT EXISTS accessed_index ON responses (accessed)")
+    self._evict()
+
+
+  # 키 key의 기록을 dict로 반환합니다. 기록이 없거나 캐시를 우회하면 None을 반환합니다.
+  def get(self, key: str) -> dict:
+    with self.lock:
+      row = None
+      if not self.bypass:
+        row = self.connection.execute("SELECT output, state FROM responses WHERE key = ?", (key,)).fetchone()
+
+      if not row:
+        self.misses += 1
+        return None
+
+      self.hits += 1
+      self.connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time(), key))
+      self.connection.commit()
+      return {"output": row[0], "state": loads(row[1])}
+
+
+  # 키 key의 기록을 응답 output, 대화 상태 state로 설정합니다.
+  def put(self, key: str, output: str, state: Any):
+    with self.lock:
+      now = time()
+      self.connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                              (key, output, dumps(state), len(output.encode("utf-8")), now, now))
+      self.connection.commit()
+    self._evict()
+
+
+  # 오래된 기록, 크기 제한을 넘는 기록을 최근 사용 시각이 오래된 순서로 제거합니다.
+  def _evict(self):
+    with self.lock:
+      expired = self.connection.execute("DELETE FROM responses WHERE accessed < ?", (time() - self.max_age,)).rowcount
+
+      total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+      evicted = 0
+      if total_size > self.max_size:
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+          if total_size <= self.max_size: break
+          self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+          total_size -= size
+          evicted += 1
+      self.connection.commit()
+
+    if expired or evicted:
+      logger.debug(f"cache evicted: {expired} expired, {evicted} over size")
+
+
+  # 캐시 사용 통계를 dict로 반환합니다.
+  def get_stats(self) -> dict:
+    with self.lock:
+      entries, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+    return {"hits": self.hits, "misses": self.misses, "entries": entries, "size": size}
+
+
+  # 캐시 사용 통계를 요약한 정보를 출력합니다.
+  def to_summary(self) -> str:
+    stats = self.get_stats()
+    return f"cache {stats['hits']} hits, {stats['misses']} misses ({stats['entries']} entries, {stats['size']} bytes)"
+
+
+# LLM 모델 model의 응답을 캐시 cache에 기록하고 재사용하는 모델 클래스.
+# 키는 모델 이름, 모델 설정, 세션의 대화 기록, 입력 메시지의 해시입니다.
+# 세션마다 감싼 모델의 세션, 대화 기록을 따로 가집니다.
+class CachedModel(Model):
+
+  @override
+  def __init__(self, model: Model, name: str, cache: ResponseCache):
+    self.model = model
+    self.name = name
+    self.cache = cache
+    self.stream = model.stream
+    self.policy = model.policy
+
+
+  # 감싼 모델의 대화 상태 state에서 시작하는 새 세션을 반환합니다.
+  @override
+  def open_session(self, state: Any = None, policy=None) -> Session:
+    session = Session(self, state, policy)
+    session.data["inner"] = self.model.open_session(state, policy)
+    session.data["history"] = []
+    return session
+
+
+  # 세션 session의 대화를 이어가는 새 세션을 반환합니다.
+  @override
+  def fork_session(self, session: Session) -> Session:
+    forked = Session(self, None, session.policy)
+    forked.data["inner"] = session.data["inner"].fork()
+    forked.data["history"] = list(session.data["history"])
+    return forked
+
+
+  # 세션 session과 감싼 모델의 세션을 닫습니다.
+  @override
+  def close_session(self, session: Session):
+    session.data["inner"].close()
+    session.state = None
+
+
+  # 세션 session의 대화 기록과 입력 inps에 해당하는 캐시 키를 반환합니다.
+  def _get_key(self, inps: list[str], session: Session) -> str:
+    data = {"name": self.name, "signature": self.model.get_signature(),
+            "history": session.data["history"], "inputs": inps}
+    return sha256(dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+  # 세션 session 안에서 LLM 모델로 inps 메시지 리스트로 작업을 요청합니다. 캐시에 기록이 있으면 요청하지 않습니다.
+  @override
+  def send_prompt(self, inps: list[str], session: Session = None) -> CacheRequest:
+    session = self._get_session(session)
+    key = self._get_key(inps, session)
+    entry = self.cache.get(key)
+    if entry:
+      logger.debug(f"cache hit: {key}")
+      return CacheRequest(key, inps, entry=entry)
+    return CacheRequest(key, inps, req=session.data["inner"].send_prompt(inps))
+
+
+  # 세션 session 안에서 LLM 모델의 요청 req의 수행 결과를 문자열로 반환합니다.
+  @override
+  def receive_prompt(self, req: CacheRequest, session: Session = None) -> str:
+    session = self._get_session(session)
+    inner = session.data["inner"]
+    if req.entry:
+      inner.state = req.entry["state"]
+      output = req.entry["output"]
+      session.usage = {"cached": True}
+    else:
+      output = inner.receive_prompt(req.request)
+      session.usage = inner.get_usage()
+      if output: self.cache.put(req.key, output, inner.state)
+
+    if output: session.data["history"].append([req.inputs, output])
+    session.state = inner.state
+    return output
+
+
+  # 세션 session 안에서 LLM 모델로 inps 메시지 리스트로 작업을 요청하고 수행 결과 문자열을 조각 단위로 반환합니다.
+  @override
+  def stream_prompt(self, inps: list[str], session: Session = None) -> Iterator[str]:
+    session = self._get_session(session)
+    inner = session.data["inner"]
+    key = self._get_key(inps, session)
+    entry = self.cache.get(key)
+    if entry:
+      inner.state = session.state = entry["state"]
+      session.data["history"].append([inps, entry["output"]])
+      session.usage = {"cached": True}
+      yield entry["output"]
+      return
+
+    chunks = []
+    for chunk in inner.stream_prompt(inps):
+      chunks.append(chunk)
+      yield chunk
+    session.usage = inner.get_usage()
+    session.state = inner.state
+
+    output = "".join(chunks)
+    if output:
+      self.cache.put(key, output, inner.state)
+      session.data["history"].append([inps, output])
+
+
+  # 같은 입력에 같은 응답을 기대할 수 있는 모델 설정을 dict로 반환합니다.
+  @override
+  def get_signature(self) -> dict:
+    return self.model.get_signature()
@@ -1,10 +1,70 @@
 from abc import abstractmethod
-from typing_extensions import Any
+from copy import deepcopy
+from dotenv import load_dotenv
+from importlib import import_module
+from typing_extensions import Any, Iterator
+
+
+# LLM 모델과 나누는 대화 하나의 세션 클래스.
+# 대화 상태, 마지막 요청의 사용량, 요청 정책을 세션마다 따로 가지므로 모델 하나로 여러 대화를 동시에 진행할 수 있습니다.
+class Session:
+
+  def __init__(self, model, state=None, policy=None):
+    self.model = model
+    self.state = state
+    self.policy = policy or model.policy
+    self.usage = {}
+    self.data = {}
+
+
+  # 세션 안에서 inps 메시지 리스트로 작업을 요청합니다.
+  def send_prompt(self, inps: list[str]) -> Any:
+    return self.model.send_prompt(inps, self)
+
+
+  # 세션 안에서 요청 req의 수행 결과를 문자열로 반환합니다.
+  def receive_prompt(self, req: object) -> str:
+    return self.model.receive_prompt(req, self)
+
+
+  # 세션 안에서 inps 메시지 리스트로 작업을 요청하고 수행 결과 문자열을 조각 단위로 반환합니다.
+  def stream_prompt(self, inps: list[str]) -> Iterator[str]:
+    return self.model.stream_prompt(inps, self)
+
+
+  # 지금까지의 대화를 이어가는 새 세션을 반환합니다.
+  def fork(self):
+    return self.model.fork_session(self)
+
+
+  # 세션을 닫습니다.
+  def close(self):
+    self.model.close_session(self)
+
+
+  # 마지막 요청의 토큰 사용량, 대기 시간을 dict로 반환합니다.
+  # 키: input_tokens, output_tokens, cached_tokens, queue, wait, cached, retries, hedged
+  def get_usage(self) -> dict:
+    return self.usage
+
+
+  def __enter__(self):
+    return self
+
+
+  def __exit__(self, *args):
+    self.close()
 
 
 # LLM 모델 클래스.
+# 요청 함수는 세션 session 안에서 동작하며, 세션이 없으면 모델의 기본 세션을 사용합니다.
 class Model:
 
+  # 응답을 스트림으로 받는지 여부, 요청 재시도 및 헤지 정책, 기본 세션.
+  stream = False
+  policy = None
+  session = None
+
   @abstractmethod # 구체화 시 구현 필요.
   def __init__(self, **configs):
     raise NotImplemented("no model initialization implementation")
@@ -12,26 +72,66 @@ class Model:
 
   # LLM 모델로 inps 메시지 리스트로 작업을 요청합니다.
   @abstractmethod # 구체화 시 구현 필요.
-  def send_prompt(self, inps: list[str]) -> Any:
+  def send_prompt(self, inps: list[str], session: Session = None) -> Any:
     raise NotImplemented("no prompt send implementation")
 
 
   # LLM 모델의 요청 req의 수행 결과를 문자열로 반환합니다.
   @abstractmethod # 구체화 시 구현 필요.
-  def receive_prompt(self, req: object) -> str:
+  def receive_prompt(self, req: object, session: Session = None) -> str:
     raise NotImplemented("no prompt receive implementation")
   
 
-  # 모델 기록을 초기화합니다.
-  @abstractmethod # 구체화 시 구현 필요.
+  # LLM 모델로 inps 메시지 리스트로 작업을 요청하고 수행 결과 문자열을 조각 단위로 반환합니다.
+  # 스트림을 지원하지 않는 모델은 전체 수행 결과를 한 번에 반환합니다.
+  def stream_prompt(self, inps: list[str], session: Session = None) -> Iterator[str]:
+    output = self.receive_prompt(self.send_prompt(inps, session), session)
+    if output: yield output
+
+
+  # 대화 상태 state에서 시작하는 새 세션을 반환합니다. policy가 없으면 모델의 요청 정책을 사용합니다.
+  def open_session(self, state: Any = None, policy=None) -> Session:
+    return Session(self, state, policy)
+
+
+  # 세션 session의 대화를 이어가는 새 세션을 반환합니다.
+  def fork_session(self, session: Session) -> Session:
+    return self.open_session(deepcopy(session.state), session.policy)
+
+
+  # 세션 session을 닫습니다.
+  def close_session(self, session: Session):
+    session.state = None
+
+
+  # 세션 session을 반환합니다. 세션이 없으면 기본 세션을 반환합니다.
+  def _get_session(self, session: Session = None) -> Session:
+    if session: return session
+    if not self.session: self.session = self.open_session()
+    return self.session
+
+
+  # 기본 세션의 대화 기록을 초기화합니다.
   def reset(self):
-    raise NotImplemented("no reset implementation")
+    self.session = self.open_session()
+
+
+  # 같은 입력에 같은 응답을 기대할 수 있는 모델 설정을 dict로 반환합니다.
+  def get_signature(self) -> dict:
+    return {"class": type(self).__name__}
+
+
+  # 기본 세션의 마지막 요청의 토큰 사용량, 대기 시간을 dict로 반환합니다.
+  def get_usage(self) -> dict:
+    return self._get_session().usage
 
 
 # LLM 모델 객체 생성 팩토리 클래스.
 class ModelFactory:
 
   _registry = {}
+  _modules = {}
+  _wrappers = []
 
   # 이름 name의 LLM 모델을 레지스트리에 등록합니다.
   @classmethod
@@ -42,15 +142,39 @@ class ModelFactory:
     return decorator
 
 
+  # 이름 name의 LLM 모델을 정의한 모듈 module을 등록합니다. 모듈은 그 모델을 처음 생성할 때 불러옵니다.
+  @classmethod
+  def register_module(cls, name: str, module: str):
+    cls._modules[name] = module
+
+
+  # 이름 name의 LLM 모델이 아직 불러오지 않은 모듈에 있으면 환경 변수와 함께 불러옵니다.
+  @classmethod
+  def _load(cls, name: str):
+    if name in cls._registry or name not in cls._modules: return
+    load_dotenv()
+    import_module(cls._modules[name])
+
+
+  # 생성한 모든 LLM 모델을 감쌀 함수 wrapper(model, name)를 등록합니다.
+  @classmethod
+  def add_wrapper(cls, wrapper):
+    cls._wrappers.append(wrapper)
+
+
   # 이름 name의 LLM 모델을 생성합니다.
   @classmethod
   def create(cls, name: str, **configs) -> Model:
+    cls._load(name)
     if name not in cls._registry:
       return None
-    return cls._registry[name](**configs)
+    model = cls._registry[name](**configs)
+    for wrapper in cls._wrappers:
+      model = wrapper(model, name)
+    return model
   
 
   # 레지스트리에 등록한 모든 LLM 모델 이름을 반환합니다.
   @classmethod
   def get_keys(cls) -> list[str]:
-    return list(cls._registry.keys())
\ No newline at end of file
+    return list(dict.fromkeys([*cls._registry.keys(), *cls._modules.keys()]))
\ No newline at end of file
@@ -0,0 +1,184 @@
+from asyncio import Semaphore, new_event_loop, run_coroutine_threadsafe, sleep
+from concurrent.futures import Future
+from openai import APIConnectionError, APITimeoutError, BadRequestError, InternalServerError, NotFoundError, RateLimitError
+from openai.types.responses import Response
+from threading import Lock, Thread
+from time import time
+from typing_extensions import override
+
+from models.model import Model, ModelFactory, Session
+from models.openai.client import Client, read_env
+from models.openai.response import Available_Model, Status, count_tokens, get_output_text, get_retry_after, read_usage
+from models.openai.waiter import Waiter
+from models.policy import PermanentError, RequestPolicy
+from models.rate_limiter import Default as Limit, RateLimiter
+from util.logger import Logger, LoggerName
+
+
+# LLM 모델 로그 출력 수준 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 동시 요청 수를 제한하는 백그라운드 이벤트 루프 클래스.
+class EventLoop:
+
+  _loop = None
+  _semaphore = None
+  _lock = Lock()
+
+  # 이벤트 루프가 없으면 데몬 스레드에서 실행하는 이벤트 루프를 생성합니다.
+  @classmethod
+  def _start(cls):
+    with cls._lock:
+      if cls._loop: return
+      loop = new_event_loop()
+      Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+      cls._semaphore = run_coroutine_threadsafe(cls._create_semaphore(), loop).result()
+      cls._loop = loop
+
+
+  # 이벤트 루프 안에서 동시 요청 수를 제한하는 세마포어를 생성합니다.
+  @staticmethod
+  async def _create_semaphore() -> Semaphore:
+    return Semaphore(read_env("LLM_CONCURRENCY", Limit.Concurrency.value, int))
+
+
+  # 세마포어 안에서 코루틴 함수 fct를 실행하는 작업을 등록하고 그 Future를 반환합니다.
+  # Future의 timing에는 세마포어를 기다린 시간 queue를 기록합니다.
+  @classmethod
+  def submit(cls, fct, *args, **kwargs) -> Future:
+    cls._start()
+    timing, submitted = {}, time()
+    async def bounded():
+      async with cls._semaphore:
+        timing["queue"] = time() - submitted
+        return await fct(*args, **kwargs)
+    future = run_coroutine_threadsafe(bounded(), cls._loop)
+    future.timing = timing
+    return future
+
+
+# OpenAI의 Response API를 비동기로 사용하는 모델 클래스.
+# 요청은 공유 이벤트 루프에서 수행되므로 여러 도구, 스레드의 요청이 동시에 진행됩니다.
+@ModelFactory.register("async_response")
+class AsyncResponse(Model):
+
+  @override
+  def __init__(self, config: dict):
+    config = dict(config)
+    self.model = config.pop('model', Available_Model.GPT_4o.value)
+    self.waiter = Waiter(Status.Working.value, **config.pop('polling', {}))
+    self.policy = RequestPolicy(self.model)
+    self.configs = config
+
+
+  # 세션 session 안에서 LLM 모델로 inps 메시지 리스트로 작업을 요청하고 완료를 기다리지 않고 Future를 반환합니다.
+  # 요청은 요청 정책에 따라 재시도, 헤지합니다. 세션의 대화 상태는 이전 Response의 id입니다.
+  @override
+  def send_prompt(self, inps: list[str], session: Session = None) -> Future:
+    session = self._get_session(session)
+    prompt_inputs = [{"role": "user", "content": inp} for inp in inps]
+    return EventLoop.submit(self._request, session.policy, self.waiter, self.model, prompt_inputs,
+                            previous_response_id=session.state, **self.configs)
+
+
+  # 세션 session 안에서 LLM 모델의 요청 req의 수행 결과를 문자열로 반환합니다.
+  @override
+  def receive_prompt(self, req: Future, session: Session = None) -> str:
+    session = self._get_session(session)
+    response, stats = req.result()
+    session.usage = {"queue": req.timing.get("queue", 0.0), **stats}
+
+    # 응답을 불러오지 못하면 None 출력.
+    if not response:
+      logger.warning("no response retrieved")
+      return None
+
+    # 수행 결과 출력.
+    session.usage.update({**read_usage(response), "wait": self.waiter.get_wait_time(response.id)})
+    if response.status == Status.Completed.value:
+      session.state = response.id
+      return get_output_text(response)
+    # 요청을 성공하지 못하면 None 출력.
+    logger.warning(f"{response.status}: {response.output_text}")
+    return None
+
+
+  # 같은 입력에 같은 응답을 기대할 수 있는 모델 설정을 dict로 반환합니다.
+  @override
+  def get_signature(self) -> dict:
+    return {"model": self.model, "configs": self.configs}
+
+
+  # 모델 model로 주어진 입력 inp에 응답하는 OpenAI의 Response를 요청 정책 policy에 따라 등록하고,
+  # 대기기 waiter로 완료된 객체와 재시도 횟수, 헤지 여부 dict 쌍을 반환합니다.
+  @staticmethod
+  async def _request(policy: RequestPolicy, waiter: Waiter, model: str, inp: list[dict], **kwargs) -> tuple[Response, dict]:
+    async def request():
+      response = await AsyncResponse._create(model, inp, **kwargs)
+      return await waiter.wait_async(response, AsyncResponse._retrieve)
+    return await policy.call_async(request)
+
+
+  # 모델 model로 주어진 입력 inp에 응답하는 OpenAI의 Response를 등록하고 그 객체를 반환합니다.
+  # 요청이 제한(429)되면 공유 요청 제한기의 대기 시간만큼, 서버나 연결 오류면 재시도 대기 시간만큼 기다린 후 다시 요청합니다.
+  # 잘못된 요청이나 없는 모델이면 PermanentError를 발생시킵니다.
+  @staticmethod
+  async def _create(model: str, inp: list[dict], **kwargs) -> Response:
+    limiter = RateLimiter.get()
+    tokens = RateLimiter.estimate_tokens(inp) + kwargs.get("max_output_tokens", 0)
+
+    for attempt in range(Limit.Throttle_Retries.value + 1):
+      await limiter.acquire_async(tokens)
+      actual = None
+      try:
+        # Response 생성.
+        response = await Client.get_async().responses.create(model=model, input=inp, **kwargs)
+        actual = count_tokens(response)
+        limiter.on_success()
+        logger.debug(f"new response {response.id} created")
+        return response
+      # 요청이 제한되면 동시 요청 수를 줄이고 기다린 후 다시 요청.
+      except RateLimitError as e:
+        limiter.on_throttle()
+        delay = limiter.get_retry_delay(attempt, get_retry_after(e))
+        logger.debug(f"response creation throttled: retry after {delay:.2f} sec")
+        await sleep(delay)
+      # 응답 시간을 초과하면 None 반환.
+      except APITimeoutError:
+        logger.debug(f"response creation failed: timeout")
+        return None
+      # 서버 오류(5xx)나 연결 오류는 동시 요청 수를 줄이지 않고 기다린 후 다시 요청.
+      except (InternalServerError, APIConnectionError) as e:
+        delay = limiter.get_retry_delay(attempt)
+        logger.debug(f"response creation failed: {type(e).__name__}: retry after {delay:.2f} sec")
+        await sleep(delay)
+      # 잘못된 요청이나 없는 모델은 다시 요청해도 실패하므로 영구 실패로 알림.
+      except (BadRequestError, NotFoundError) as e:
+        error_message = e.body["message"]
+        logger.debug(f"response creation failed: {error_message}")
+        raise PermanentError(error_message) from e
+      finally:
+        limiter.release(tokens, actual)
+
+    logger.warning("response creation failed: retries exhausted")
+    return None
+
+
+  # id를 가진 OpenAI의 Response를 불러오고 그 객체를 반환합니다.
+  @staticmethod
+  async def _retrieve(id: str) -> Response:
+    try:
+      # Response 찾기.
+      response = await Client.get_async().responses.retrieve(id)
+      logger.debug(f"response {id} retrieved")
+      return response
+    # 응답 시간을 초과하면 None 반환.
+    except APITimeoutError:
+      logger.debug(f"response retrieval failed: timeout")
+      return None
+    # 요청을 실패하면 None 반환.
+    except (BadRequestError, NotFoundError) as e:
+      error_message = e.body["message"]
+      logger.debug(f"response retrieval failed: {error_message}")
+      return None
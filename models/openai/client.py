@@ -0,0 +1,74 @@
+from dotenv import load_dotenv
+from enum import Enum
+from importlib.util import find_spec
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from os import getenv
+from threading import Lock
+
+# openai SDK 버전에 따라 httpx 또는 httpx2를 HTTP 클라이언트로 사용.
+try:
+  from httpx import Limits
+except ImportError:
+  from httpx2 import Limits
+
+
+# OpenAI 클라이언트 초기 값 열거형 클래스.
+class Default(Enum):
+  Timeout = 60.0
+  Pool_Size = 32
+  Keepalive_Expiry = 30.0
+
+
+# 환경 변수 name의 값을 타입 cast로 반환합니다. 없으면 default를 반환합니다.
+def read_env(name: str, default, cast=float):
+  try:
+    return cast(getenv(name))
+  except Exception:
+    return default
+
+
+# 모든 Response 모델, 스레드가 공유하는 OpenAI 클라이언트 클래스.
+# 클라이언트는 처음 사용할 때 생성하고, 연결 풀을 유지해 요청마다 TLS 연결을 새로 맺지 않습니다.
+class Client:
+
+  _client = None
+  _async_client = None
+  _lock = Lock()
+
+  # 환경 변수로 설정한 HTTP 클라이언트 인자를 dict로 반환합니다.
+  # HTTP/2는 h2 패키지가 설치되어 있으면 사용합니다.
+  @staticmethod
+  def _get_http_configs() -> dict:
+    load_dotenv()
+    pool_size = read_env("LLM_POOL_SIZE", Default.Pool_Size.value, int)
+    limits = Limits(max_connections=pool_size, max_keepalive_connections=pool_size,
+                    keepalive_expiry=Default.Keepalive_Expiry.value)
+    return {"limits": limits, "http2": find_spec("h2") is not None}
+
+
+  # OpenAI 클라이언트 생성 인자를 dict로 반환합니다.
+  # 요청 제한(429)과 서버(5xx), 연결 오류는 공유 요청 제한기의 반복에서 재시도하므로 클라이언트는 재시도하지 않습니다.
+  @staticmethod
+  def _get_configs() -> dict:
+    return {"api_key": getenv("OPENAI_API_KEY"), "max_retries": 0,
+            "timeout": read_env("LLM_TIMEOUT", Default.Timeout.value)}
+
+
+  # 공유 OpenAI 클라이언트를 반환합니다.
+  @classmethod
+  def get(cls) -> OpenAI:
+    with cls._lock:
+      if not cls._client:
+        http_client = DefaultHttpxClient(**cls._get_http_configs())
+        cls._client = OpenAI(http_client=http_client, **cls._get_configs())
+      return cls._client
+
+
+  # 공유 비동기 OpenAI 클라이언트를 반환합니다.
+  @classmethod
+  def get_async(cls) -> AsyncOpenAI:
+    with cls._lock:
+      if not cls._async_client:
+        http_client = DefaultAsyncHttpxClient(**cls._get_http_configs())
+        cls._async_client = AsyncOpenAI(http_client=http_client, **cls._get_configs())
+      return cls._async_client
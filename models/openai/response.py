@@ -1,23 +1,18 @@
-from dotenv import load_dotenv
 from enum import Enum
-from openai import APITimeoutError, BadRequestError, NotFoundError, OpenAI
+from functools import partial
+from openai import APIConnectionError, APITimeoutError, BadRequestError, InternalServerError, NotFoundError, RateLimitError
 from openai.types.responses import Response, ResponseItem
-from os import getenv
 from time import sleep
-from typing_extensions import override
+from typing_extensions import Iterator, override
 
-from models.model import Model, ModelFactory
+from models.model import Model, ModelFactory, Session
+from models.openai.client import Client
+from models.openai.waiter import Waiter
+from models.policy import PermanentError, RequestPolicy
+from models.rate_limiter import Default as Limit, RateLimiter
 from util.logger import Logger, LoggerName
 
 
-# 환경 변수로 등록한 OpenAI API 키, 시간 제한 가져오기.
-load_dotenv()
-try:
-  _timeout = float(getenv("LLM_TIMEOUT"))
-except Exception:
-  _timeout = 60.0
-_client = OpenAI(api_key=getenv("OPENAI_API_KEY"), timeout=_timeout)
-
 # LLM 모델 로그 출력 수준 설정.
 logger = Logger.get_logger(LoggerName.Internal)
 
@@ -28,11 +23,42 @@ class Available_Model(Enum):
 # Response API의 작업 수행 상태 열거형 클래스.
 class Status(Enum):
   Completed = "completed"
+  Queued = "queued"
   Validating = "validating"
   In_Progress = "in_progress"
   Finalizing = "finializing"
   Cancelling = "cancelling"
-  Working = [Validating, In_Progress, Finalizing, Cancelling]
+  Working = [Queued, Validating, In_Progress, Finalizing, Cancelling]
+
+
+# 완료된 OpenAI의 Response response의 출력 문자열을 반환합니다.
+def get_output_text(response: Response) -> str:
+  for output in response.output:
+    if output.type != "message": continue
+    for content in output.content:
+      if content.type != "output_text": continue
+      return content.text
+  return None
+
+
+# OpenAI의 Response response의 전체 토큰 수를 반환합니다. 사용량이 없으면 None을 반환합니다.
+def count_tokens(response: Response) -> int:
+  usage = read_usage(response)
+  return usage["input_tokens"] + usage["output_tokens"] if usage else None
+
+
+# 요청 제한 오류 e의 재시도 대기 시간 헤더 값을 반환합니다.
+def get_retry_after(e: RateLimitError) -> str:
+  return getattr(getattr(e, "response", None), "headers", {}).get("retry-after")
+
+
+# OpenAI의 Response response의 토큰 사용량을 dict로 반환합니다.
+def read_usage(response: Response) -> dict:
+  usage = getattr(response, "usage", None)
+  if not usage: return {}
+  details = getattr(usage, "input_tokens_details", None)
+  return {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens,
+          "cached_tokens": getattr(details, "cached_tokens", 0) or 0}
 
 
 # OpenAI의 Response API를 사용하는 모델 클래스.
@@ -41,37 +67,39 @@ class Response(Model):
 
   @override
   def __init__(self, config: dict):
+    config = dict(config)
     self.model = config.pop('model', Available_Model.GPT_4o.value)
+    self.waiter = Waiter(Status.Working.value, **config.pop('polling', {}))
+    self.stream = config.pop('stream', False)
+    self.policy = RequestPolicy(self.model)
     self.configs = config
 
 
-  # LLM 모델로 inps 메시지 리스트로 작업을 요청합니다.
+  # 세션 session 안에서 LLM 모델로 inps 메시지 리스트로 작업을 요청합니다. 요청은 요청 정책에 따라 재시도, 헤지합니다.
+  # 세션의 대화 상태는 이전 Response의 id입니다.
   @override
-  def send_prompt(self, inps: list[str]) -> Response:
+  def send_prompt(self, inps: list[str], session: Session = None) -> Response:
+    session = self._get_session(session)
     prompt_inputs = [{"role": "user", "content": inp} for inp in inps]
-    response = self._create(self.model, prompt_inputs, **self.configs)
+    create = partial(self._create, self.model, prompt_inputs, previous_response_id=session.state, **self.configs)
+    response, session.data["request_stats"] = session.policy.call(create, discard=self._cancel)
     return response
 
 
-  # LLM 모델의 요청 req의 수행 결과를 문자열로 반환합니다.
+  # 세션 session 안에서 LLM 모델의 요청 req의 수행 결과를 문자열로 반환합니다.
   @override
-  def receive_prompt(self, req: Response) -> str:
+  def receive_prompt(self, req: Response, session: Session = None) -> str:
+    session = self._get_session(session)
+    session.usage = dict(session.data.get("request_stats", {}))
     try:
-      # response 불러오기.
-      response = self._retrieve(req.id)
-      while response and response.status in Status.Working.value:
-        response = self._retrieve(req.id)
-        sleep(3)
+      # 생성 결과가 완료되지 않았으면 완료될 때까지 response 불러오기.
+      response = self.waiter.wait(req, self._retrieve)
+      session.usage.update({**read_usage(response), "wait": self.waiter.get_wait_time(response.id)})
 
       # 수행 결과 출력.
       if response.status == Status.Completed.value:
-        self.configs["previous_response_id"] = req.id
-
-        for output in response.output:
-          if output.type != "message": continue
-          for content in output.content:
-            if content.type != "output_text": continue
-            return content.text
+        session.state = req.id
+        return get_output_text(response)
       # 요청을 성공하지 못하면 None 출력.
       else:
         logger.warning(f"{response.status}: {response.output_text}")
@@ -82,39 +110,136 @@ class Response(Model):
       return None
 
 
-  # 모델 기록을 초기화합니다.
+  # 세션 session 안에서 LLM 모델로 inps 메시지 리스트로 작업을 요청하고 수행 결과 문자열을 조각 단위로 반환합니다.
+  # 요청이 제한(429)되면 공유 요청 제한기의 대기 시간만큼, 서버나 연결 오류면 재시도 대기 시간만큼 기다린 후 다시 요청합니다.
+  @override
+  def stream_prompt(self, inps: list[str], session: Session = None) -> Iterator[str]:
+    session = self._get_session(session)
+    prompt_inputs = [{"role": "user", "content": inp} for inp in inps]
+    limiter = RateLimiter.get()
+    tokens = RateLimiter.estimate_tokens(prompt_inputs) + self.configs.get("max_output_tokens", 0)
+    session.usage, streamed = {}, False
+
+    for attempt in range(Limit.Throttle_Retries.value + 1):
+      limiter.acquire(tokens)
+      actual = None
+      try:
+        for event in Client.get().responses.create(model=self.model, input=prompt_inputs, stream=True,
+                                                   previous_response_id=session.state, **self.configs):
+          # 수행 결과 조각 출력.
+          if event.type == "response.output_text.delta":
+            streamed = True
+            yield event.delta
+          # 수행 완료 시 대화 기록 갱신.
+          elif event.type == "response.completed":
+            session.state = event.response.id
+            session.usage = read_usage(event.response)
+            actual = count_tokens(event.response)
+            logger.debug(f"response {event.response.id} streamed")
+          # 요청을 성공하지 못하면 종료.
+          elif event.type in ("response.failed", "response.incomplete", "error"):
+            logger.warning(f"response streaming stopped: {event.type}")
+            return
+        limiter.on_success()
+        return
+      # 요청이 제한되면 동시 요청 수를 줄이고 기다린 후 다시 요청.
+      except RateLimitError as e:
+        limiter.on_throttle()
+        delay = limiter.get_retry_delay(attempt, get_retry_after(e))
+        logger.debug(f"response streaming throttled: retry after {delay:.2f} sec")
+        sleep(delay)
+      # 응답 시간을 초과하면 종료.
+      except APITimeoutError:
+        logger.debug(f"response streaming failed: timeout")
+        return
+      # 서버 오류(5xx)나 연결 오류는 동시 요청 수를 줄이지 않고 기다린 후 다시 요청. 이미 출력한 조각이 있으면 종료.
+      except (InternalServerError, APIConnectionError) as e:
+        if streamed:
+          logger.warning(f"response streaming stopped: {type(e).__name__}")
+          return
+        delay = limiter.get_retry_delay(attempt)
+        logger.debug(f"response streaming failed: {type(e).__name__}: retry after {delay:.2f} sec")
+        sleep(delay)
+      # 요청을 실패하면 종료.
+      except (BadRequestError, NotFoundError) as e:
+        error_message = e.body["message"]
+        logger.debug(f"response streaming failed: {error_message}")
+        return
+      finally:
+        limiter.release(tokens, actual)
+    logger.warning("response streaming failed: retries exhausted")
+
+
+  # 같은 입력에 같은 응답을 기대할 수 있는 모델 설정을 dict로 반환합니다.
   @override
-  def reset(self):
-    self.configs["previous_response_id"] = None
+  def get_signature(self) -> dict:
+    return {"model": self.model, "configs": self.configs}
 
 
   # 모델 model로 주어진 입력 inp에 응답하는 OpenAI의 Response를 등록하고 그 객체를 반환합니다.
+  # 요청이 제한(429)되면 공유 요청 제한기의 대기 시간만큼, 서버나 연결 오류면 재시도 대기 시간만큼 기다린 후 다시 요청합니다.
+  # 잘못된 요청이나 없는 모델이면 PermanentError를 발생시킵니다.
   # model 목록: https://platform.openai.com/docs/pricing
   # 인자 목록: https://platform.openai.com/docs/api-reference/responses/create
   @staticmethod
   def _create(model: str, inp: list[dict], **kwargs) -> Response:
+    limiter = RateLimiter.get()
+    tokens = RateLimiter.estimate_tokens(inp) + kwargs.get("max_output_tokens", 0)
+
+    for attempt in range(Limit.Throttle_Retries.value + 1):
+      limiter.acquire(tokens)
+      actual = None
+      try:
+        # Response 생성.
+        response = Client.get().responses.create(model=model, input=inp, **kwargs)
+        actual = count_tokens(response)
+        limiter.on_success()
+        logger.debug(f"new response {response.id} created")
+        return response
+      # 요청이 제한되면 동시 요청 수를 줄이고 기다린 후 다시 요청.
+      except RateLimitError as e:
+        limiter.on_throttle()
+        delay = limiter.get_retry_delay(attempt, get_retry_after(e))
+        logger.debug(f"response creation throttled: retry after {delay:.2f} sec")
+        sleep(delay)
+      # 응답 시간을 초과하면 None 반환.
+      except APITimeoutError:
+        logger.debug(f"response creation failed: timeout")
+        return None
+      # 서버 오류(5xx)나 연결 오류는 동시 요청 수를 줄이지 않고 기다린 후 다시 요청.
+      except (InternalServerError, APIConnectionError) as e:
+        delay = limiter.get_retry_delay(attempt)
+        logger.debug(f"response creation failed: {type(e).__name__}: retry after {delay:.2f} sec")
+        sleep(delay)
+      # 잘못된 요청이나 없는 모델은 다시 요청해도 실패하므로 영구 실패로 알림.
+      except (BadRequestError, NotFoundError) as e:
+        error_message = e.body["message"]
+        logger.debug(f"response creation failed: {error_message}")
+        raise PermanentError(error_message) from e
+      finally:
+        limiter.release(tokens, actual)
+
+    logger.warning("response creation failed: retries exhausted")
+    return None
+
+
+  # 헤지에서 진 OpenAI의 Response response가 아직 진행 중이면 취소합니다.
+  @staticmethod
+  def _cancel(response: Response):
+    if response.status not in Status.Working.value: return
     try:
-      # Response 생성.
-      response = _client.responses.create(model=model, input=inp, **kwargs)
-      logger.debug(f"new response {response.id} created")
-      return response
-    # 응답 시간을 초과하면 None 반환.
-    except APITimeoutError:
-      logger.debug(f"response creation failed: timeout")
-      return None
-    # 요청을 실패하면 None 반환.
-    except BadRequestError or NotFoundError as e:
-      error_message = e.body["message"]
-      logger.debug(f"response creation failed: {error_message}")
-      return None
-  
+      Client.get().responses.cancel(response.id)
+      logger.debug(f"response {response.id} cancelled")
+    except (APITimeoutError, BadRequestError, NotFoundError):
+      logger.debug(f"response cancellation failed: {response.id}")
+
 
   # id를 가진 OpenAI의 Response를 불러오고 그 객체를 반환합니다.
   @staticmethod
   def _retrieve(id: str) -> Response:
     try:
       # Response 찾기.
-      response = _client.responses.retrieve(id)
+      response = Client.get().responses.retrieve(id)
       logger.debug(f"response {id} retrieved")
       return response
     # 존재하지 않는 id라면 None 반환.
@@ -136,7 +261,7 @@ class Response(Model):
   def _delete(id: str):
     try:
       # Response 제거.
-      _client.responses.delete(id)
+      Client.get().responses.delete(id)
       logger.debug(f"response {id} deleted")
     # 존재하지 않는 id라면 종료.
     except ValueError:
@@ -156,7 +281,7 @@ class Response(Model):
   def _list(self, rid: str, **kwargs) -> list[ResponseItem]:
     try:
       # Response의 입력 요소 찾기.
-      input_items = _client.responses.input_items.list(rid, **kwargs)
+      input_items = Client.get().responses.input_items.list(rid, **kwargs)
       return input_items.data
     # 응답 시간을 초과하면 빈 리스트 반환.
     except APITimeoutError as e:
@@ -0,0 +1,79 @@
+from asyncio import sleep as async_sleep
+from enum import Enum
+from random import uniform
+from time import sleep, time
+
+from util.logger import Logger, LoggerName
+
+
+# LLM 모델 로그 출력 수준 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 응답 완료 대기 초기 값 열거형 클래스.
+class Default(Enum):
+  Initial = 0.25
+  Factor = 2.0
+  Ceiling = 8.0
+  Jitter = 0.2
+  Limit = 600.0
+
+
+# 지수 백오프와 지터로 응답 완료를 기다리는 대기기 클래스.
+# 생성 요청이 이미 완료된 응답을 반환하면 추가 조회 없이 그대로 사용합니다.
+class Waiter:
+
+  def __init__(self, working: list[str], initial=Default.Initial.value, factor=Default.Factor.value,
+               ceiling=Default.Ceiling.value, jitter=Default.Jitter.value, limit=Default.Limit.value):
+    self.working = working
+    self.initial = initial
+    self.factor = factor
+    self.ceiling = ceiling
+    self.jitter = jitter
+    self.limit = limit
+    self.wait_times = {}
+
+
+  # 다음 조회까지 기다릴 시간 목록을 차례로 반환합니다.
+  def _delays(self):
+    delay = self.initial
+    while True:
+      yield min(self.ceiling, delay * uniform(1 - self.jitter, 1 + self.jitter))
+      delay = min(self.ceiling, delay * self.factor)
+
+
+  # 응답 response가 완료될 때까지 조회 함수 retrieve로 다시 불러오고 마지막 응답을 반환합니다.
+  def wait(self, response, retrieve):
+    start_time, delays = time(), self._delays()
+    while response and response.status in self.working:
+      if time() - start_time > self.limit:
+        logger.debug(f"response {response.id} waiting stopped: over {self.limit} sec")
+        break
+      sleep(next(delays))
+      response = retrieve(response.id) or response
+    return self._record(response, time() - start_time)
+
+
+  # 응답 response가 완료될 때까지 비동기 조회 함수 retrieve로 다시 불러오고 마지막 응답을 반환합니다.
+  async def wait_async(self, response, retrieve):
+    start_time, delays = time(), self._delays()
+    while response and response.status in self.working:
+      if time() - start_time > self.limit:
+        logger.debug(f"response {response.id} waiting stopped: over {self.limit} sec")
+        break
+      await async_sleep(next(delays))
+      response = await retrieve(response.id) or response
+    return self._record(response, time() - start_time)
+
+
+  # 응답 response의 대기 시간 elapsed를 기록하고 응답을 반환합니다.
+  def _record(self, response, elapsed: float):
+    if response:
+      self.wait_times[response.id] = elapsed
+      logger.debug(f"response {response.id} waited {elapsed:.2f} sec")
+    return response
+
+
+  # id를 가진 응답의 대기 시간을 반환합니다.
+  def get_wait_time(self, id: str) -> float:
+    return self.wait_times.get(id, 0.0)
@@ -0,0 +1,188 @@
+from asyncio import FIRST_COMPLETED as ASYNC_FIRST_COMPLETED, create_task, sleep as async_sleep, wait as async_wait
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from enum import Enum
+from random import random
+from threading import Lock
+from time import sleep, time
+from typing_extensions import Any, Callable
+
+from util.logger import Logger, LoggerName
+
+
+# 요청 정책 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 요청 정책 초기 값 열거형 클래스.
+class Default(Enum):
+  Retries = 2
+  Backoff = 0.5
+  Ceiling = 8.0
+  Quantile = 0.95
+  Min_Samples = 20
+  Window = 200
+  Workers = 32
+
+
+# 다시 요청해도 같은 결과를 얻는 실패(잘못된 요청, 없는 모델 등)를 알리는 예외 클래스.
+# 요청 정책은 이 예외를 받으면 재시도하지 않고 None을 반환합니다.
+class PermanentError(Exception):
+  pass
+
+
+# 요청 결과가 None(시간 초과 등 다시 시도할 만한 실패)이면 지수 백오프로 제한된 횟수만큼 다시 요청하고,
+# 요청이 관측한 지연 시간 분위수(p95)를 넘으면 같은 요청을 한 번 더 보내 먼저 끝난 결과를 사용하는 요청 정책 클래스.
+# 지연 시간은 같은 이름 name의 정책끼리 공유합니다.
+class RequestPolicy:
+
+  _latencies = {}
+  _lock = Lock()
+  _executor = None
+
+  def __init__(self, name="", retries=Default.Retries.value, backoff=Default.Backoff.value,
+               ceiling=Default.Ceiling.value, hedge=False, quantile=Default.Quantile.value,
+               min_samples=Default.Min_Samples.value, hedge_delay=None):
+    self.name = name
+    self.retries = retries
+    self.backoff = backoff
+    self.ceiling = ceiling
+    self.hedge = hedge
+    self.quantile = quantile
+    self.min_samples = min_samples
+    self.hedge_delay = hedge_delay
+    with self._lock:
+      self.latencies = self._latencies.setdefault(name, deque(maxlen=Default.Window.value))
+
+
+  # 헤지 요청을 실행하는 공유 스레드 풀을 반환합니다.
+  @classmethod
+  def _get_executor(cls) -> ThreadPoolExecutor:
+    with cls._lock:
+      if not cls._executor:
+        cls._executor = ThreadPoolExecutor(Default.Workers.value, thread_name_prefix="llm-hedge")
+      return cls._executor
+
+
+  # 헤지 요청을 보내기 전 기다릴 시간을 반환합니다. 헤지하지 않으면 None을 반환합니다.
+  def get_hedge_delay(self) -> float:
+    if not self.hedge: return None
+    if self.hedge_delay is not None: return self.hedge_delay
+    with self._lock:
+      latencies = sorted(self.latencies)
+    if len(latencies) < self.min_samples: return None
+    return latencies[min(len(latencies) - 1, int(len(latencies) * self.quantile))]
+
+
+  # attempt번째 재시도 전 기다릴 시간을 반환합니다.
+  def _get_backoff(self, attempt: int) -> float:
+    delay = self.backoff * 2 ** (attempt - 1)
+    return min(delay * (1 + random()), self.ceiling)
+
+
+  # 성공한 요청의 지연 시간 latency를 기록합니다.
+  def _record(self, latency: float):
+    with self._lock:
+      self.latencies.append(latency)
+
+
+  # 함수 fct를 실행하고 결과를 반환합니다. 결과가 있으면 지연 시간을 기록합니다.
+  def _timed(self, fct: Callable) -> Any:
+    start_time = time()
+    result = fct()
+    if result is not None: self._record(time() - start_time)
+    return result
+
+
+  # 함수 fct를 정책에 따라 실행하고 결과와 재시도 횟수, 헤지 여부 dict 쌍을 반환합니다.
+  # 헤지에서 진 요청의 결과는 discard로 정리하며, 영구 실패면 다시 요청하지 않고 None을 반환합니다.
+  def call(self, fct: Callable, discard=None) -> tuple[Any, dict]:
+    stats = {"retries": 0, "hedged": False}
+    for attempt in range(self.retries + 1):
+      if attempt:
+        stats["retries"] += 1
+        delay = self._get_backoff(attempt)
+        logger.debug(f"request retry #{attempt} after {delay:.2f} sec")
+        sleep(delay)
+      try:
+        result = self._call_hedged(fct, discard, stats)
+      except PermanentError as e:
+        logger.warning(f"request failed permanently: {e}")
+        return None, stats
+      if result is not None: return result, stats
+    return None, stats
+
+
+  # 함수 fct를 실행하고 헤지 대기 시간을 넘으면 한 번 더 실행해 먼저 끝난 결과를 반환합니다.
+  def _call_hedged(self, fct: Callable, discard, stats: dict) -> Any:
+    delay = self.get_hedge_delay()
+    if delay is None: return self._timed(fct)
+
+    executor = self._get_executor()
+    first = executor.submit(self._timed, fct)
+    done, _ = wait([first], timeout=delay)
+    if done: return first.result()
+
+    stats["hedged"] = True
+    logger.debug(f"request hedged after {delay:.2f} sec")
+    pending, result = {first, executor.submit(self._timed, fct)}, None
+    try:
+      while pending and result is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        results = [future.result() for future in done if future.result() is not None]
+        if results: result = results[0]
+    finally:
+      # 진 요청은 취소하고, 이미 보낸 요청은 결과가 오면 정리.
+      for future in pending:
+        if future.cancel() or not discard: continue
+        future.add_done_callback(lambda f: not f.exception() and f.result() is not None and discard(f.result()))
+    return result
+
+
+  # 코루틴 함수 fct를 정책에 따라 실행하고 결과와 재시도 횟수, 헤지 여부 dict 쌍을 반환합니다.
+  # 헤지에서 진 요청은 취소하며, 영구 실패면 다시 요청하지 않고 None을 반환합니다.
+  async def call_async(self, fct: Callable) -> tuple[Any, dict]:
+    stats = {"retries": 0, "hedged": False}
+    for attempt in range(self.retries + 1):
+      if attempt:
+        stats["retries"] += 1
+        delay = self._get_backoff(attempt)
+        logger.debug(f"request retry #{attempt} after {delay:.2f} sec")
+        await async_sleep(delay)
+      try:
+        result = await self._call_hedged_async(fct, stats)
+      except PermanentError as e:
+        logger.warning(f"request failed permanently: {e}")
+        return None, stats
+      if result is not None: return result, stats
+    return None, stats
+
+
+  # 코루틴 함수 fct를 실행하고 헤지 대기 시간을 넘으면 한 번 더 실행해 먼저 끝난 결과를 반환합니다.
+  async def _call_hedged_async(self, fct: Callable, stats: dict) -> Any:
+    async def timed():
+      start_time = time()
+      result = await fct()
+      if result is not None: self._record(time() - start_time)
+      return result
+
+    delay = self.get_hedge_delay()
+    if delay is None: return await timed()
+
+    first = create_task(timed())
+    done, _ = await async_wait({first}, timeout=delay)
+    if done: return first.result()
+
+    stats["hedged"] = True
+    logger.debug(f"request hedged after {delay:.2f} sec")
+    pending, result = {first, create_task(timed())}, None
+    try:
+      while pending and result is None:
+        done, pending = await async_wait(pending, return_when=ASYNC_FIRST_COMPLETED)
+        results = [task.result() for task in done if task.result() is not None]
+        if results: result = results[0]
+    finally:
+      # 진 요청 취소.
+      for task in pending:
+        task.cancel()
+    return result
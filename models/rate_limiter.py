@@ -0,0 +1,189 @@
+from asyncio import sleep as async_sleep
+from dotenv import load_dotenv
+from enum import Enum
+from os import getenv
+from random import random
+from threading import Condition, Lock
+from time import monotonic
+
+from util.logger import Logger, LoggerName
+
+
+# 요청 제한기 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 요청 제한기 초기 값 열거형 클래스.
+class Default(Enum):
+  Concurrency = 16
+  Min_Concurrency = 1
+  Throttle_Cooldown = 3.0
+  Chars_Per_Token = 4
+  Poll_Interval = 0.05
+  Throttle_Retries = 5
+  Throttle_Delay = 0.5
+  Throttle_Max_Delay = 30.0
+
+
+# 분당 rate만큼 채워지는 토큰 버킷 클래스. rate가 0 이하이면 제한하지 않습니다.
+class TokenBucket:
+
+  def __init__(self, rate: float):
+    self.rate = rate
+    self.capacity = rate
+    self.tokens = rate
+    self.updated = monotonic()
+
+
+  # 경과 시간만큼 토큰을 채웁니다.
+  def _refill(self):
+    now = monotonic()
+    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate / 60)
+    self.updated = now
+
+
+  # amount만큼 토큰을 사용할 수 있으면 사용하고 0을, 없으면 기다려야 하는 시간을 반환합니다.
+  def try_consume(self, amount: float) -> float:
+    if self.rate <= 0: return 0.0
+    self._refill()
+    amount = min(amount, self.capacity)
+    if self.tokens >= amount:
+      self.tokens -= amount
+      return 0.0
+    return (amount - self.tokens) * 60 / self.rate
+
+
+  # 토큰을 amount만큼 더 사용하거나, 음수이면 돌려받습니다.
+  def adjust(self, amount: float):
+    if self.rate <= 0: return
+    self._refill()
+    self.tokens = min(self.capacity, self.tokens - amount)
+
+
+# 모든 LLM 모델 호출이 공유하는 분당 요청 수, 토큰 수 제한기 클래스.
+# 동시 요청 수는 AIMD로 조정합니다: 429 응답마다 절반으로 줄이고, 제한 없이 성공하면 1씩 늘립니다.
+class RateLimiter:
+
+  _instance = None
+  _instance_lock = Lock()
+
+  def __init__(self, rpm=0, tpm=0, concurrency=Default.Concurrency.value):
+    self.requests = TokenBucket(rpm)
+    self.tokens = TokenBucket(tpm)
+    self.max_concurrency = concurrency
+    self.concurrency = concurrency
+    self.active = 0
+    self.successes = 0
+    self.throttles = 0
+    self.last_throttle = 0.0
+    self.condition = Condition()
+
+
+  # 환경 변수 LLM_RPM, LLM_TPM, LLM_CONCURRENCY로 설정한 공유 제한기를 반환합니다.
+  @classmethod
+  def get(cls):
+    with cls._instance_lock:
+      if not cls._instance:
+        load_dotenv()
+        cls._instance = cls(_read_env("LLM_RPM", 0), _read_env("LLM_TPM", 0),
+                            int(_read_env("LLM_CONCURRENCY", Default.Concurrency.value)))
+      return cls._instance
+
+
+  # 입력 inp의 토큰 수를 추정합니다.
+  @staticmethod
+  def estimate_tokens(inp) -> int:
+    return len(str(inp)) // Default.Chars_Per_Token.value + 1
+
+
+  # 동시 요청 자리, 요청 1개, 토큰 tokens개를 사용할 수 있으면 사용하고 0을, 없으면 기다려야 하는 시간을 반환합니다.
+  def try_acquire(self, tokens: int) -> float:
+    with self.condition:
+      if self.active >= self.concurrency: return Default.Poll_Interval.value
+      wait = self.requests.try_consume(1)
+      if wait: return wait
+      wait = self.tokens.try_consume(tokens)
+      if wait:
+        self.requests.adjust(-1)
+        return wait
+      self.active += 1
+      return 0.0
+
+
+  # 요청 자리를 얻을 때까지 기다립니다.
+  def acquire(self, tokens: int):
+    while True:
+      wait = self.try_acquire(tokens)
+      if not wait: return
+      with self.condition:
+        self.condition.wait(wait)
+
+
+  # 요청 자리를 얻을 때까지 비동기로 기다립니다.
+  async def acquire_async(self, tokens: int):
+    while True:
+      wait = self.try_acquire(tokens)
+      if not wait: return
+      await async_sleep(wait)
+
+
+  # 요청 자리를 돌려주고 추정 토큰 수 estimated와 실제 토큰 수 actual의 차이를 반영합니다.
+  def release(self, estimated=0, actual=None):
+    with self.condition:
+      self.active = max(0, self.active - 1)
+      if actual is not None:
+        self.tokens.adjust(actual - estimated)
+      self.condition.notify_all()
+
+
+  # 요청이 제한 없이 성공하면 동시 요청 수를 늘립니다.
+  def on_success(self):
+    with self.condition:
+      self.successes += 1
+      if self.successes >= self.concurrency and self.concurrency < self.max_concurrency:
+        self.concurrency += 1
+        self.successes = 0
+        logger.debug(f"rate limiter concurrency increased: {self.concurrency}")
+        self.condition.notify_all()
+
+
+  # 요청이 제한(429)되면 동시 요청 수를 절반으로 줄입니다. 짧은 시간 안의 연속 제한은 한 번만 반영합니다.
+  def on_throttle(self):
+    with self.condition:
+      self.throttles += 1
+      self.successes = 0
+      now = monotonic()
+      if now - self.last_throttle < Default.Throttle_Cooldown.value: return
+      self.last_throttle = now
+      self.concurrency = max(Default.Min_Concurrency.value, self.concurrency // 2)
+      logger.info(f"rate limited: concurrency decreased to {self.concurrency}")
+
+
+  # attempt번째 제한된 요청을 다시 보내기 전 기다릴 시간을 반환합니다. 서버가 알려준 시간 retry_after를 우선합니다.
+  @staticmethod
+  def get_retry_delay(attempt: int, retry_after=None) -> float:
+    try:
+      return min(float(retry_after), Default.Throttle_Max_Delay.value)
+    except (TypeError, ValueError):
+      delay = Default.Throttle_Delay.value * 2 ** attempt
+      return min(delay * (1 + random()), Default.Throttle_Max_Delay.value)
+
+
+  # 요청 제한 통계를 dict로 반환합니다.
+  def get_stats(self) -> dict:
+    with self.condition:
+      return {"throttles": self.throttles, "concurrency": self.concurrency}
+
+
+  # 요청 제한 통계를 요약한 정보를 출력합니다.
+  def to_summary(self) -> str:
+    stats = self.get_stats()
+    return f"rate limiter {stats['throttles']} throttles, concurrency {stats['concurrency']}/{self.max_concurrency}"
+
+
+# 환경 변수 name의 숫자 값을 반환합니다. 없으면 default를 반환합니다.
+def _read_env(name: str, default: float) -> float:
+  try:
+    return float(getenv(name))
+  except Exception:
+    return default
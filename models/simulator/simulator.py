@@ -0,0 +1,268 @@
+from ast import ClassDef, Constant, Expr, FunctionDef, NodeVisitor, parse
+from enum import Enum
+from functools import partial
+from json import dumps
+from pathlib import Path
+from random import Random
+from re import findall, search, DOTALL
+from time import sleep
+from typing_extensions import Any, override
+from uuid import uuid4
+
+from models.model import Model, ModelFactory, Session
+from models.policy import RequestPolicy
+from models.rate_limiter import Default as Limit, RateLimiter
+from util.logger import Logger, LoggerName
+
+
+# LLM 모델 로그 출력 수준 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 모의 LLM 모델 초기 값 열거형 클래스.
+class Default(Enum):
+  Latency = {"distribution": "lognormal", "mu": 1.0, "sigma": 0.5}
+  Tokens_Per_Char = 0.25
+  Output_Tokens = {"distribution": "uniform", "low": 200, "high": 800}
+  Candidates = 3
+  Wrong_Args = ("1", "'x'", "None", "[]", "{}")
+
+
+# 모의 LLM 모델이 지원하는 출력 형식 열거형 클래스.
+class Format(Enum):
+  Code_Lines = "print_code_lines"
+  Test_Codes = "print_test_codes"
+
+
+# 모의 LLM 모델 요청 클래스.
+class SimulatedRequest:
+  def __init__(self, id: str, status: str, output_text: str, latency: float, usage: dict, history: list[str]):
+    self.id = id
+    self.status = status
+    self.output_text = output_text
+    self.latency = latency
+    self.usage = usage
+    self.history = history
+
+
+# 프롬프트 코드의 함수, 클래스 메소드 정의 구문 탐색 클래스.
+class _DefinitionVisitor(NodeVisitor):
+
+  def __init__(self):
+    self.stack = []
+    self.lines = []
+    self.params = {}
+
+
+  # 클래스 정의 구문 노드 진입 시 클래스 이름을 스택에 추가합니다.
+  def visit_ClassDef(self, node: ClassDef):
+    self.stack.append(node.name)
+    self.generic_visit(node)
+    self.stack.pop()
+
+
+  # 함수 정의 구문 노드 진입 시 docstring을 제외한 함수 본문 첫 구문과 self, cls를 제외한 필수 인자 이름을 기록합니다.
+  def visit_FunctionDef(self, node: FunctionDef):
+    method = ".".join(self.stack + [node.name])
+    args = node.args.posonlyargs + node.args.args
+    required = args[:len(args) - len(node.args.defaults)]
+    self.params[method] = [arg.arg for arg in required if arg.arg not in ("self", "cls")]
+    body = node.body
+    if isinstance(body[0], Expr) and isinstance(body[0].value, Constant) and isinstance(body[0].value.value, str):
+      body = body[1:]
+    if body:
+      self.lines.append((method, body[0].lineno))
+
+
+# 네트워크 없이 OpenAI Response API 모델을 흉내 내는 모의 LLM 모델 클래스.
+# 지연 시간, 시간 초과, 오류 비율, 토큰 수를 설정으로 주입하고 스키마를 만족하는 출력을 반환합니다.
+@ModelFactory.register("simulator")
+class Simulator(Model):
+
+  @override
+  def __init__(self, config: dict):
+    config = dict(config)
+    self.model = config.pop('model', "simulator")
+    self.latency = config.pop('latency', Default.Latency.value)
+    self.timeout = config.pop('timeout', 60.0)
+    self.timeout_rate = config.pop('timeout_rate', 0.0)
+    self.error_rate = config.pop('error_rate', 0.0)
+    self.throttle_rate = config.pop('throttle_rate', 0.0)
+    self.throttle_delay = config.pop('throttle_delay', 1.0)
+    self.tokens_per_char = config.pop('tokens_per_char', Default.Tokens_Per_Char.value)
+    self.output_tokens = config.pop('output_tokens', Default.Output_Tokens.value)
+    self.random = Random(config.pop('seed', None))
+    self.format = config.get("text", {}).get("format", {}).get("name", "")
+    self.policy = RequestPolicy(self.model)
+    self.configs = config
+
+
+  # 분포 설정 dist에서 값 하나를 뽑아 반환합니다.
+  def _sample(self, dist: Any) -> float:
+    if isinstance(dist, (int, float)): return float(dist)
+
+    name = dist.get("distribution", "constant")
+    if name == "constant":
+      return float(dist.get("value", 0.0))
+    elif name == "uniform":
+      return self.random.uniform(dist.get("low", 0.0), dist.get("high", 1.0))
+    elif name == "normal":
+      return max(0.0, self.random.gauss(dist.get("mu", 0.0), dist.get("sigma", 1.0)))
+    elif name == "lognormal":
+      return self.random.lognormvariate(dist.get("mu", 0.0), dist.get("sigma", 1.0))
+    elif name == "exponential":
+      return self.random.expovariate(1.0 / dist.get("mean", 1.0))
+    logger.warning(f"unknown distribution '{name}': use 0")
+    return 0.0
+
+
+  # 세션 session 안에서 LLM 모델로 inps 메시지 리스트로 작업을 요청합니다. 요청은 요청 정책에 따라 재시도, 헤지합니다.
+  # 세션의 대화 상태는 이전 응답 id와 대화 기록 dict입니다.
+  @override
+  def send_prompt(self, inps: list[str], session: Session = None) -> SimulatedRequest:
+    session = self._get_session(session)
+    history = (session.state or {}).get("history", [])
+    req, session.data["request_stats"] = session.policy.call(partial(self._create, history + inps, inps))
+    return req
+
+
+  # 세션 session 안에서 LLM 모델의 요청 req의 수행 결과를 문자열로 반환합니다.
+  @override
+  def receive_prompt(self, req: SimulatedRequest, session: Session = None) -> str:
+    session = self._get_session(session)
+    session.usage = dict(session.data.get("request_stats", {}))
+    # 응답을 불러오지 못하면 None 출력.
+    if not req:
+      logger.warning("no response retrieved")
+      return None
+
+    session.usage.update({**req.usage, "wait": req.latency})
+    session.state = {"id": req.id, "history": req.history}
+    return req.output_text
+
+
+  # 대화 기록을 포함한 입력 history, 새 입력 inps에 응답하는 모의 요청을 지연 시간 후 반환합니다.
+  # 요청은 공유 요청 제한기의 자리를 차지하고, 제한(429)되면 기다린 후 다시 요청합니다.
+  def _create(self, history: list[str], inps: list[str]) -> SimulatedRequest:
+    id = f"sim_{uuid4().hex}"
+    latency = self._sample(self.latency)
+    cached = history[:len(history) - len(inps)]
+    usage = {"input_tokens": int(sum(len(inp) for inp in history) * self.tokens_per_char),
+             "output_tokens": int(self._sample(self.output_tokens)),
+             "cached_tokens": int(sum(len(inp) for inp in cached) * self.tokens_per_char)}
+    limiter = RateLimiter.get()
+    tokens = usage["input_tokens"]
+
+    for attempt in range(Limit.Throttle_Retries.value + 1):
+      limiter.acquire(tokens)
+
+      # 요청 제한 시 동시 요청 수를 줄이고 기다린 후 다시 요청.
+      if self.throttle_rate and self.random.random() < self.throttle_rate:
+        limiter.release()
+        limiter.on_throttle()
+        delay = limiter.get_retry_delay(attempt, self.throttle_delay)
+        logger.debug(f"response creation throttled: retry after {delay:.2f} sec")
+        sleep(delay)
+        continue
+
+      # 시간 초과, 요청 실패 시 None 반환.
+      roll = self.random.random()
+      if roll < self.timeout_rate:
+        sleep(self.timeout)
+        limiter.release()
+        logger.debug(f"response creation failed: timeout")
+        return None
+      elif roll < self.timeout_rate + self.error_rate:
+        limiter.release()
+        logger.debug(f"response creation failed: simulated error")
+        return None
+
+      sleep(latency)
+      limiter.release(tokens, usage["input_tokens"] + usage["output_tokens"])
+      limiter.on_success()
+      output = self._generate_output("\n".join(inps), "\n".join(history))
+      logger.debug(f"new response {id} created")
+      return SimulatedRequest(id, "completed", output, latency, usage, history)
+
+    logger.warning("response creation failed: rate limit retries exhausted")
+    return None
+
+
+  # 같은 입력에 같은 응답을 기대할 수 있는 모델 설정을 dict로 반환합니다.
+  @override
+  def get_signature(self) -> dict:
+    return {"model": self.model, "configs": self.configs}
+
+
+  # 프롬프트 prompt와 대화 기록을 포함한 문맥 context에 대하여 출력 형식에 맞는 응답 문자열을 반환합니다.
+  def _generate_output(self, prompt: str, context: str = "") -> str:
+    if self.format == Format.Code_Lines.value:
+      return dumps({"lines": self._generate_lines(prompt)})
+    elif self.format == Format.Test_Codes.value:
+      return dumps({"codes": self._generate_codes(prompt, context or prompt)})
+    return "simulated response"
+
+
+  # 프롬프트 prompt의 코드에서 함수마다 첫 구문을 잠재적인 오류 줄로 반환합니다.
+  def _generate_lines(self, prompt: str) -> list[dict]:
+    lines = []
+    for code in findall(r"```python\n(.*?)\n```", prompt, DOTALL):
+      try:
+        tree = parse(code)
+      except SyntaxError:
+        continue
+      raw_codes = code.split("\n")
+      visitor = _DefinitionVisitor()
+      visitor.visit(tree)
+      for method, lineno in visitor.lines:
+        lines.append({"method": method, "lineno": lineno,
+                      "code": raw_codes[lineno - 1].strip(), "reason": "simulated TypeError risk"})
+    return lines
+
+
+  # 프롬프트 prompt가 요청한 개수의 테스트 코드를 반환합니다.
+  # 대상 함수는 프롬프트에서, 그 모듈과 인자는 문맥 context의 코드에서 찾아 Negative 테스트는 잘못된 타입의 인자로,
+  # Positive 테스트는 정수 인자로 대상 함수를 호출합니다. 대상 함수를 찾지 못하면 빈 테스트를 반환합니다.
+  def _generate_codes(self, prompt: str, context: str) -> list[dict]:
+    matched = search(r"Write (\d+)", prompt)
+    num = int(matched.group(1)) if matched else Default.Candidates.value
+    kind = "pos" if "not to trigger" in prompt else "neg"
+    targets = findall(r"line \d+ of ([\w.]+)\.|in '([\w.]+)'", prompt)
+    fct = next((name for pair in reversed(targets) for name in pair if name), "")
+    module, params = self._find_definition(fct, context) if fct else (None, [])
+
+    codes = []
+    for i in range(num):
+      name = f"test_{kind}_{i+1}"
+      if not module:
+        codes.append({"name": name, "code": f"def {name}():\n    pass"})
+        continue
+      wrongs = Default.Wrong_Args.value
+      args = [wrongs[(i + j) % len(wrongs)] if kind == "neg" else str(i + j + 1) for j in range(len(params))]
+      owner, _, method = fct.rpartition(".")
+      call = f"{owner}.{method}(None, {', '.join(args)})" if owner else f"{fct}({', '.join(args)})"
+      imported = owner.split(".")[0] if owner else fct
+      codes.append({"name": name, "code": f"def {name}():\n    from {module} import {imported}\n    {call}"})
+    return codes
+
+
+  # 문맥 context의 '### 경로' 코드 중 함수 fct를 정의한 코드의 모듈 이름, 필수 인자 이름 리스트 쌍을 반환합니다.
+  # 모듈 이름은 현재 경로 기준이며, 찾지 못하면 (None, [])를 반환합니다.
+  @staticmethod
+  def _find_definition(fct: str, context: str) -> tuple[str, list[str]]:
+    for path, code in reversed(findall(r"### (.+?)\n```python\n(.*?)\n```", context, DOTALL)):
+      try:
+        tree = parse(code)
+      except SyntaxError:
+        continue
+      visitor = _DefinitionVisitor()
+      visitor.visit(tree)
+      if fct not in visitor.params: continue
+      path = Path(path)
+      if path.is_absolute():
+        try:
+          path = path.resolve().relative_to(Path.cwd().resolve())
+        except ValueError:
+          path = Path(path.name)
+      return ".".join(path.with_suffix("").parts), visitor.params[fct]
+    return None, []
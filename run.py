@@ -1,12 +1,22 @@
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from functools import partial
 from pathlib import Path
+from time import time
 
+from models.cache import CachedModel, ResponseCache
 from models.model import ModelFactory
+from models.rate_limiter import RateLimiter
+from common.errorline import ErrorLine
 from tools.error_line_identifier.run import run as run_identifier, _classify_by_function
 from tools.test_generator.run import run as run_tester
-from util.filesys import read_json, write_file, write_json, make_directory
+from util.filesys import read_file, read_json, write_file, write_json, make_directory
+from util.journal import Journal
 from util.logger import Logger, LoggerName
+from util.manifest import Manifest, hash_configs, hash_functions
+from util.metrics import Metrics
+from util.workspace import Retain, Workspace
 from validation.framework import TestFrameworkFactory
 from web_response import WebResponse
 
@@ -23,17 +33,22 @@ class Default(Enum):
   Pos_Config_Path = Path("configs/openai/response/pos_test_generator.json")
   Framework_Config_Path = Path()
   Out_DirPath = Path("out")
+  Cache_Size = 512
+  Cache_Age = 30
+  Jobs = 1
+  Identify_Iteration = 5
 
 
 # 웹 인터페이스 응답 메시지 열거형 클래스.
 class ResponseMessage(Enum):
   Error_No_Line = "no type error lines identified"
   Error_No_Neg = "no negative testcases"
+  Error_Exception = "test generation failed: {}"
   Message_Complete = "negative({}), positive({}) tests generated"
 
 
-# 입력 인자를 파싱합니다.
-def parse_arguments() -> Namespace:
+# 입력 인자 파서를 반환합니다.
+def build_parser() -> ArgumentParser:
   # 선택 가능한 모델, 테스트 프레임워크 리스트 구성.
   available_models = ModelFactory.get_keys()
   available_frameworks = TestFrameworkFactory.get_keys()
@@ -78,7 +93,217 @@ def parse_arguments() -> Namespace:
   parser.add_argument("-o", "--out", metavar="OUTPUT_PATH", type=Path,
                       default=Default.Out_DirPath.value,
                       help="output path")
-  return parser.parse_args()
+  parser.add_argument("-cp", "--cache-path", metavar="CACHE_PATH", type=Path,
+                      default=None,
+                      help="LLM response cache path (disabled if not given)")
+  parser.add_argument("-cs", "--cache-size", metavar="CACHE_SIZE_MB", type=int,
+                      default=Default.Cache_Size.value,
+                      help="LLM response cache size limit (MB)")
+  parser.add_argument("-ca", "--cache-age", metavar="CACHE_AGE_DAYS", type=int,
+                      default=Default.Cache_Age.value,
+                      help="LLM response cache age limit (days)")
+  parser.add_argument("-cb", "--cache-bypass", action="store_true",
+                      help="don't use cached LLM responses, but record new responses")
+  parser.add_argument("-j", "--jobs", metavar="JOB_NUM", type=int,
+                      default=Default.Jobs.value,
+                      help="number of functions processed concurrently")
+  parser.add_argument("-sp", "--speculative", action="store_true",
+                      help="generate positive tests concurrently with negative tests")
+  parser.add_argument("-jn", "--journal", metavar="JOURNAL_PATH", type=Path,
+                      default=None,
+                      help="task journal path to resume an interrupted run")
+  parser.add_argument("-rg", "--regenerate", action="store_true",
+                      help="regenerate all functions, even unchanged ones in the manifest")
+  parser.add_argument("-pm", "--prometheus", metavar="PROMETHEUS_PATH", type=Path,
+                      default=None,
+                      help="LLM call metrics Prometheus text export path")
+  parser.add_argument("-ws", "--workspace", metavar="WORKSPACE_ROOT", type=Path,
+                      default=None,
+                      help="root directory of validation workspaces (default: system temporary directory)")
+  parser.add_argument("-wr", "--workspace-retain", metavar="RETAIN_POLICY", type=str,
+                      default=Retain.Never.value, choices=[retain.value for retain in Retain],
+                      help="workspace retain policy after validation")
+  return parser
+
+
+# 입력 인자를 파싱합니다.
+def parse_arguments() -> Namespace:
+  return build_parser().parse_args()
+
+
+# 함수 fct의 오류 줄 리스트 errs에 대한 테스트케이스를 생성하고 응답, 테스트 파일을 출력 경로 out에 기록합니다.
+# 생성 중 오류가 발생해도 실패 응답을 기록하고 반환하므로 다른 함수의 생성은 계속됩니다.
+def _generate_function(fct: str, errs: list, src: list[Path], res: dict, iter: int, n_num: int, p_num: int, model: str,
+                       neg_config: dict, pos_config: dict, fw: str, fw_config: dict, out: Path, speculative=False,
+                       journal: Journal = None) -> WebResponse:
+  response_dir_path = out/"response"
+  response = WebResponse()
+  response.set_function(fct)
+
+  if not errs:
+    response.set_success(False)
+    response.set_message(ResponseMessage.Error_No_Line.value)
+    write_json(response_dir_path/f"{fct}.json", response.to_dict())
+    logger.info(f"Failed: function {fct} - {ResponseMessage.Error_No_Line.value}")
+    return response
+
+  # 테스트케이스 생성.
+  try:
+    neg_tests, pos_tests = run_tester(src, res, errs, iter, 5, n_num, p_num, model, neg_config, pos_config, fw, fw_config,
+                                     speculative, journal)
+  except Exception as e:
+    logger.exception(f"function {fct} test generation failed")
+    response.set_success(False)
+    response.set_message(ResponseMessage.Error_Exception.value.format(e))
+    write_json(response_dir_path/f"{fct}.json", response.to_dict())
+    return response
+  response.set_negative_tests(neg_tests)
+  response.set_positive_tests(pos_tests)
+
+  # Negative 테스트케이스 파일 출력.
+  if not neg_tests:
+    response.set_success(False)
+    response.set_message(ResponseMessage.Error_No_Neg.value)
+    write_json(response_dir_path/f"{fct}.json", response.to_dict())
+    logger.info(f"Failed: function {fct} - {ResponseMessage.Error_No_Neg.value}")
+    return response
+
+  # Negative 테스트케이스 파일 출력.
+  if neg_tests:  
+    codes = "\n\n".join(test.to_py() for test in neg_tests)
+    write_file(out/f"{fct}_neg_test.py", codes)
+
+  # Positive 테스트케이스 파일 출력.
+  if pos_tests:
+    codes = "\n\n".join(test.to_py() for test in pos_tests)
+    write_file(out/f"{fct}_pos_test.py", codes)
+  
+  msg = ResponseMessage.Message_Complete.value.format(len(neg_tests), len(pos_tests))
+  response.set_success(True)
+  response.set_message(msg)
+  write_json(response_dir_path/f"{fct}.json", response.to_dict())
+  logger.info(f"Success: function {fct} - {msg}")
+  return response
+
+
+# 입력 인자 args의 설정 경로에서 오류 줄 탐지기, Negative, Positive 테스트 생성기, 테스트 프레임워크 설정을 읽어 dict로 반환합니다.
+def read_configs(args: Namespace) -> dict:
+  paths = {"err": args.err_configs, "neg": args.neg_configs, "pos": args.pos_configs, "fw": args.fw_configs}
+  return {key: read_json(path) if path != Path() else {} for key, path in paths.items()}
+
+
+# 입력 인자 args로 LLM 응답 캐시를 설정하고 반환합니다. 캐시 경로가 없으면 None을 반환합니다.
+def set_cache(args: Namespace) -> ResponseCache:
+  if not args.cache_path: return None
+  cache = ResponseCache(args.cache_path, args.cache_size * 1024 * 1024,
+                        args.cache_age * 24 * 60 * 60, args.cache_bypass)
+  ModelFactory.add_wrapper(partial(CachedModel, cache=cache))
+  return cache
+
+
+# 코드 경로 리스트 src의 첫 파일에서 함수 fcts의 테스트케이스를 생성하고 출력 경로 out에 기록합니다.
+# 함수마다의 생성은 스레드 풀 executor에서 수행하며, 대상 함수 순서의 응답 리스트와 이전 결과를 이어서 사용한 함수 이름 리스트 쌍을 반환합니다.
+def run_file(src: list[Path], fcts: list[str], res: dict, args: Namespace, configs: dict, out: Path,
+             executor: ThreadPoolExecutor, journal: Journal = None) -> tuple[list[WebResponse], list[str]]:
+  make_directory(out/"response")
+
+  # 함수 AST 해시, 설정 해시가 바뀐 함수만 다시 생성. 바뀌지 않은 함수는 이전 결과를 이어서 사용.
+  manifest = Manifest(out/"manifest.json")
+  hashes = hash_functions(src[0])
+  config = hash_configs(refs={str(p): "".join(read_file(p) or []) for p in src[1:]}, res=res, iter=args.iter,
+                        n_num=args.neg_num, p_num=args.pos_num, model=args.model, fw=args.framework,
+                        err_config=configs["err"], neg_config=configs["neg"], pos_config=configs["pos"],
+                        fw_config=configs["fw"])
+  changed = set(hashes) if args.regenerate else set(manifest.get_changed(hashes, config))
+  targets = fcts or list(hashes)
+  carried = [fct for fct in targets if fct in hashes and fct not in changed]
+  if carried:
+    logger.info(f"{src[0]}: {len(carried)}/{len(targets)} functions unchanged: reuse previous results")
+
+  # TypeError 발생 가능 코드 줄 탐지.
+  errorlines = []
+  if len(carried) < len(targets):
+    identify_fcts = fcts if not carried else [fct for fct in targets if fct not in carried]
+    identify = partial(run_identifier, src[0], identify_fcts, Default.Identify_Iteration.value, args.model, configs["err"])
+    if journal:
+      task = f"identify:{src[0]}:{','.join(identify_fcts)}:{hash_configs(model=args.model, config=configs['err'], functions=hashes)}"
+      identify = partial(journal.run, task, identify,
+                         dump=lambda lines: {"lines": [line.to_dict() for line in lines]},
+                         load=ErrorLine.from_json)
+    errorlines = identify()
+  classified = {fct: errs for fct, errs in _classify_by_function(errorlines).items() if fct not in carried}
+  for fct in fcts:
+    if fct not in carried: classified.setdefault(fct, [])
+
+  # 다시 생성하는 함수의 이전 테스트 파일 제거.
+  for fct in classified:
+    (out/f"{fct}_neg_test.py").unlink(missing_ok=True)
+    (out/f"{fct}_pos_test.py").unlink(missing_ok=True)
+
+  # 함수마다 테스트케이스 생성. 결과는 함수 순서대로 모음.
+  generate = partial(_generate_function, src=src, res=res, iter=args.iter, n_num=args.neg_num, p_num=args.pos_num,
+                     model=args.model, neg_config=configs["neg"], pos_config=configs["pos"], fw=args.framework,
+                     fw_config=configs["fw"], out=out, speculative=args.speculative, journal=journal)
+  futures = [executor.submit(generate, fct, errs) for fct, errs in classified.items()]
+  responses = [future.result() for future in futures]
+
+  # 생성 기록 목록 갱신. 예외로 실패한 함수는 다음 실행에서 다시 생성.
+  finished = {r.function: r for r in responses
+              if r.success or r.message in (ResponseMessage.Error_No_Line.value, ResponseMessage.Error_No_Neg.value)}
+  for fct in targets:
+    if fct not in hashes or fct in carried: continue
+    if fct in finished:
+      manifest.update(fct, hashes[fct], config, {"success": finished[fct].success, "message": finished[fct].message})
+    elif fct not in classified:
+      manifest.update(fct, hashes[fct], config)
+  manifest.retain(list(hashes))
+  manifest.save()
+
+  # 바뀌지 않은 함수의 이전 결과 연결.
+  by_function = {response.function: response for response in responses}
+  for fct in carried:
+    result = manifest.get_result(fct)
+    if result is None: continue
+    response = WebResponse()
+    response.set_function(fct)
+    response.set_success(result["success"])
+    response.set_message(result["message"])
+    by_function[fct] = response
+
+  # 새 결과와 이전 결과를 대상 함수 순서대로 모음. 대상 밖의 함수 결과는 뒤에 추가.
+  ordered = [by_function.pop(fct) for fct in targets if fct in by_function]
+  return ordered + list(by_function.values()), carried
+
+
+# 응답 리스트 responses와 LLM 호출 측정 기록, 캐시 cache, 작업 기록 journal, 요청 제한기 통계를 요약해 출력 경로 out에 기록합니다.
+# 요약 summary의 나머지 항목은 그대로 기록하고, prometheus 경로가 있으면 측정 기록을 Prometheus 형식으로도 기록합니다.
+def write_summary(out: Path, summary: dict, cache: ResponseCache = None, journal: Journal = None, prometheus: Path = None):
+  summary = {**Metrics.summarize(), **summary}
+  if cache:
+    summary["cache"] = cache.get_stats()
+    logger.info(cache.to_summary())
+  if journal:
+    summary["journal"] = journal.get_stats()
+    logger.info(journal.to_summary())
+  summary["rate_limit"] = RateLimiter.get().get_stats()
+  logger.info(RateLimiter.get().to_summary())
+  # 함수 이름과 겹치지 않도록 함수마다의 응답 폴더 옆에 기록.
+  make_directory(out)
+  write_json(out/"summary.json", summary)
+  if prometheus:
+    write_file(prometheus, Metrics.to_prometheus())
+
+  total = summary["total"]
+  logger.info(f"LLM calls {total['calls']}: input {total['input_tokens']} (cached {total['cached_tokens']}), "
+              f"output {total['output_tokens']} tokens, ${total['cost']:.4f}")
+  if total["wasted_tokens"]:
+    logger.info(f"discarded speculative calls: {total['wasted_tokens']} tokens, ${total['wasted_cost']:.4f}")
+
+
+# 응답 리스트 responses를 요약 결과 리스트로 반환합니다. 이전 결과를 이어서 사용한 함수는 carried에 있습니다.
+def to_results(responses: list[WebResponse], carried: list[str]) -> list[dict]:
+  return [{"function": r.function, "success": r.success, "message": r.message,
+           "carried": r.function in carried} for r in responses]
 
 
 def main():
@@ -88,73 +313,29 @@ def main():
   src = args.src
   res = args.res
   fcts = args.fcts
-  iter = args.iter
-  n_num = args.neg_num
-  p_num = args.pos_num
-  model = args.model
-  fw = args.framework
-  err_path = args.err_configs
-  neg_path = args.neg_configs
-  pos_path = args.pos_configs
-  fw_path = args.fw_configs
   out = args.out
 
-  response_dir_path = out/"response"
-  make_directory(response_dir_path)
-  response = WebResponse()
+  # LLM 응답 캐시, 작업 기록 설정. 작업 기록이 있으면 완료한 작업은 다시 수행하지 않음.
+  cache = set_cache(args)
+  journal = Journal(args.journal) if args.journal else None
+  Workspace.configure(args.workspace, args.workspace_retain)
+
+  start_time = time()
+  make_directory(out)
 
   # 추가 정보, 설정 내용 상세 구성.
   res = dict(item.split(":", 1) for item in res if ":" in item)
-  err_config = read_json(err_path) if err_path != Path() else {}
-  neg_config = read_json(neg_path) if neg_path != Path() else {}
-  pos_config = read_json(pos_path) if pos_path != Path() else {}
-  fw_config = read_json(fw_path) if fw_path != Path() else {}
+  configs = read_configs(args)
 
-  # TypeError 발생 가능 코드 줄 탐지.
-  errorlines = run_identifier(src[0], fcts, 5, model, err_config)
-  classified = _classify_by_function(errorlines)
-  for fct in fcts:
-    classified.setdefault(fct, [])
-
-  for fct, errs in classified.items():
-    if not errs:
-      response.set_success(False)
-      response.set_message(ResponseMessage.Error_No_Line.value)
-      write_json(response_dir_path/f"{fct}.json", response.to_dict())
-      logger.info(f"Failed: function {fct} - {ResponseMessage.Error_No_Line.value}")
-      continue
-
-    # 테스트케이스 생성.
-    neg_tests, pos_tests = run_tester(src, res, errs, iter, 5, n_num, p_num, model, neg_config, pos_config, fw, fw_config)
-    response.reset()
-    response.set_function(fct)
-    response.set_negative_tests(neg_tests)
-    response.set_positive_tests(pos_tests)
-    
-    # Negative 테스트케이스 파일 출력.
-    if not neg_tests:
-      response.set_success(False)
-      response.set_message(ResponseMessage.Error_No_Neg.value)
-      write_json(response_dir_path/f"{fct}.json", response.to_dict())
-      logger.info(f"Failed: function {fct} - {ResponseMessage.Error_No_Neg.value}")
-      continue
-
-    # Negative 테스트케이스 파일 출력.
-    if neg_tests:  
-      codes = "\n\n".join(test.to_py() for test in neg_tests)
-      write_file(out/f"{fct}_neg_test.py", codes)
-
-    # Positive 테스트케이스 파일 출력.
-    if pos_tests:
-      codes = "\n\n".join(test.to_py() for test in pos_tests)
-      write_file(out/f"{fct}_pos_test.py", codes)
-    
-    msg = ResponseMessage.Message_Complete.value.format(len(neg_tests), len(pos_tests))
-    response.set_success(True)
-    response.set_message(msg)
-    write_json(response_dir_path/f"{fct}.json", response.to_dict())
-    logger.info(f"Success: function {fct} - {msg}")
+  # 테스트케이스 생성.
+  with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+    responses, carried = run_file(src, fcts, res, args, configs, out, executor, journal)
+  logger.info(f"{sum(r.success for r in responses)}/{len(responses)} functions succeeded")
+
+  # LLM 호출 측정 기록 요약 출력.
+  write_summary(out, {"elapsed": round(time() - start_time, 3), "results": to_results(responses, carried)},
+                cache, journal, args.prometheus)
 
 
 if __name__ == "__main__":
-  main()
\ No newline at end of file
+  main()
@@ -1,75 +1,246 @@
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
 from time import time
 from typing_extensions import Any
 
 from models.model import ModelFactory
+from models.policy import RequestPolicy
+from tools.stopping import StoppingPolicy
 from util.logger import Logger, LoggerName
+from util.metrics import CallRecord, Metrics
 
 
 # LLM 요청 도구 로그 출력 설정.
 logger = Logger.get_logger(LoggerName.Tool)
 
 
+# LLM 요청 도구 설정 configs를 LLM 모델 설정, LLM 요청 도구 설정 쌍으로 나누어 반환합니다.
+# LLM 요청 도구 설정은 LLM 모델 설정 json의 "tool" 항목입니다.
+def split_configs(configs: dict) -> tuple[dict, dict]:
+  model_configs = dict(configs)
+  tool_configs = model_configs.pop("tool", {})
+  return model_configs, tool_configs
+
+
+# 결과를 버릴 수도 있는 LLM 요청 도구 추측 실행 클래스.
+# 취소 신호와 추측 실행이 사용한 호출 측정 기록을 가집니다.
+class Speculation:
+
+  def __init__(self):
+    self.event = Event()
+    self.records = []
+
+
+  # 추측 실행을 취소합니다. 실행 중인 도구는 진행 중인 호출이 끝나면 멈춥니다.
+  def cancel(self):
+    self.event.set()
+
+
+  # 추측 실행이 취소되었는지 반환합니다.
+  def is_cancelled(self) -> bool:
+    return self.event.is_set()
+
+
+  # 추측 실행의 결과를 버리고, 사용한 호출을 낭비로 기록한 뒤 그 합계를 dict로 반환합니다.
+  def discard(self) -> dict:
+    self.cancel()
+    for record in self.records:
+      record.wasted = True
+    return Metrics.aggregate(self.records)
+
+
 # LLM 요청 도구 클래스.
 class ToolBase():
 
-  def __init__(self, model, iter):
+  # 측정 기록에 사용하는 도구 이름, 현재 반복 횟수, 현재 대화 세션, 추측 실행, 반복 종료 정책, 마지막 호출 측정 기록.
+  tool = "tool"
+  step = 0
+  session = None
+  speculation = None
+  stopping = None
+  last_record = None
+
+  def __init__(self, model, iter, configs={}):
     self.model = model
     self.iteration = iter
+    self.configs = configs
+
 
+  # LLM 요청 도구를 새 대화 세션에서 실행합니다. 추측 실행 speculation이 취소되면 멈춥니다.
+  def run(self, speculation: Speculation = None, **kwargs) -> list[Any]:
+    self.speculation = speculation
+    self.stopping = StoppingPolicy.create(self.configs)
+    policy = RequestPolicy(self.tool, **self.configs.get("policy", {}))
+    with self.model.open_session(policy=policy) as self.session:
+      return self._run(**kwargs)
+
+
+  # LLM 요청 도구를 현재 대화 세션에서 실행합니다.
+  # 도구 설정 "pipeline"이 true이면 결과 검증과 다음 요청을 겹쳐 실행합니다.
+  def _run(self, **kwargs) -> list[Any]:
+    if self.configs.get("pipeline") and not self.model.stream:
+      return self._run_pipelined(**kwargs)
 
-  # LLM 요청 도구를 실행합니다.
-  def run(self, **kwargs) -> list[Any]:
     outputs, feedback = [], []
     start_time = time()
-    self.model.reset()
-
-    for _ in range(self.iteration):
-      valids, invalids = self._validate(self.run_once(feedback, **kwargs), **kwargs)
-      new_valids = [cand for cand in valids if cand not in outputs]
-      
-      # 새로운 유효한 결과, 유효하지 않은 결과가 없으면 조기 종료.
-      if not new_valids and not invalids:
-        logger.info(f"LLM tool stopped: no more items")
-        break
-
-      outputs.extend(new_valids)
-      if new_valids:
-        str_outputs = ", ".join(out.to_summary() for out in new_valids)
-        logger.info(f"{len(new_valids)} new items found: total {len(outputs)}\n{str_outputs}")
-      else:
-        logger.info(f"no items found: total {len(outputs)}")
 
+    for i in range(self.iteration):
+      self.step = i + 1
+      self.last_record = None
+      outs = self.run_once(feedback, **kwargs)
 
-      # 충분한 결과를 찾으면 조기 종료.
-      if self._is_terminated(outputs, **kwargs):
-        logger.info(f"LLM running stopped: enough items")
+      # 추측 실행이 취소되면 종료.
+      if self.speculation and self.speculation.is_cancelled():
+        logger.info(f"LLM running cancelled")
         break
 
-      feedback = self._set_feedback(invalids, **kwargs)
+      finished, feedback = self._merge(outs, outputs, self._count_tokens(self.last_record), **kwargs)
+      if finished: break
 
     end_time = time() - start_time
     logger.info(f"LLM running total elapsed time: {end_time:.2f} sec")
     return outputs
 
 
+  # 결과를 검증하는 동안 다음 요청을 미리 보내는 방식으로 LLM 요청 도구를 현재 대화 세션에서 실행합니다.
+  # k번째 결과를 검증하는 동안 k+1번째 요청을 보내므로, k번째 결과의 피드백은 k+2번째 요청에 반영됩니다.
+  # 미리 보내는 요청에 반영할 피드백이 없으면 처음 요청을 다시 보내지 않고 다른 결과를 더 요청합니다.
+  def _run_pipelined(self, **kwargs) -> list[Any]:
+    outputs, feedback, overlap = [], [], 0.0
+    start_time = time()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.tool}-pipeline")
+    future = executor.submit(self._request, self.session, feedback, 1, **kwargs)
+    validation = None
+
+    try:
+      for i in range(self.iteration):
+        self.step = i + 1
+        output, record = future.result()
+        future = None
+
+        # 직전 결과 검증과 겹친 시간을 절약한 시간으로 기록.
+        if validation is not None:
+          record.overlap = min(validation, record.latency)
+          overlap += record.overlap
+
+        # 추측 실행이 취소되면 종료.
+        if self.speculation and self.speculation.is_cancelled():
+          logger.info(f"LLM running cancelled")
+          break
+
+        # 다음 요청을 먼저 보내고 현재 결과 검증.
+        if i + 1 < self.iteration:
+          future = executor.submit(self._request, self.session, feedback, i + 2, more=not feedback, **kwargs)
+        validation_start = time()
+        outs = self._process_outputs(output, **kwargs) if output else []
+        finished, feedback = self._merge(outs, outputs, self._count_tokens(record), **kwargs)
+        validation = time() - validation_start
+        if finished: break
+
+    finally:
+      # 미리 보낸 요청이 남아 있으면 세션을 닫기 전에 끝나기를 기다려 결과를 낭비로 기록.
+      if future and future.exception() is None:
+        future.result()[1].wasted = True
+      executor.shutdown()
+
+    end_time = time() - start_time
+    logger.info(f"LLM running total elapsed time: {end_time:.2f} sec (pipelined, {overlap:.2f} sec overlapped)")
+    return outputs
+
+
+  # 호출 측정 기록 record의 입력, 출력 토큰 수 합을 반환합니다.
+  @staticmethod
+  def _count_tokens(record: CallRecord) -> int:
+    return record.input_tokens + record.output_tokens if record else 0
+
+
+  # tokens개의 토큰을 사용한 호출의 결과 리스트 outs를 검증하여 새 유효한 결과를 결과 리스트 outputs에 추가합니다.
+  # 종료 여부, 다음 요청의 피드백 쌍을 반환합니다.
+  def _merge(self, outs: list[Any], outputs: list[Any], tokens=0, **kwargs) -> tuple[bool, list[Any]]:
+    valids, invalids = self._validate(outs, **kwargs)
+    new_valids = [cand for cand in valids if cand not in outputs]
+    
+    # 새로운 유효한 결과, 유효하지 않은 결과가 없으면 조기 종료.
+    if not new_valids and not invalids:
+      logger.info(f"LLM tool stopped: no more items")
+      return True, []
+
+    outputs.extend(new_valids)
+    if new_valids:
+      str_outputs = ", ".join(out.to_summary() for out in new_valids)
+      logger.info(f"{len(new_valids)} new items found: total {len(outputs)}\n{str_outputs}")
+    else:
+      logger.info(f"no items found: total {len(outputs)}")
+
+    # 충분한 결과를 찾으면 조기 종료.
+    if self._is_terminated(outputs, **kwargs):
+      logger.info(f"LLM running stopped: enough items")
+      return True, []
+
+    # 다음 호출의 기대 이득이 작으면 조기 종료.
+    if self.stopping.update(len(new_valids), tokens):
+      logger.info(f"LLM running stopped: {self.stopping.to_summary()}")
+      return True, []
+
+    return False, self._set_feedback(invalids, **kwargs)
+
+
   # 이전 수행 결과 feedback을 바탕으로 LLM 요청 도구를 1번 실행하고 결과 리스트를 반환합니다.
   def run_once(self, feedback=None, **kwargs) -> list[Any]:
-    info, request = self._generate_queries(feedback, **kwargs)
+    output, _ = self._request(self.session, feedback, **kwargs)
+    if not output: return []
+    return self._process_outputs(output, **kwargs)
+
+
+  # 대화 세션 session에서 이전 수행 결과 feedback을 바탕으로 LLM에 1번 요청하고 응답, 측정 기록 쌍을 반환합니다.
+  # step은 측정 기록의 반복 횟수이며, 없으면 현재 반복 횟수를 사용합니다. more가 참이면 이전 요청에 이어 결과를 더 요청합니다.
+  def _request(self, session, feedback=None, step=None, more=False, **kwargs) -> tuple[str, CallRecord]:
+    info, request = self._generate_queries(feedback, more, **kwargs)
     str_request = " ".join(request)
     logger.info(f"send message: {str_request}")
 
-    process = self.model.send_prompt(info + request)
-    output = self.model.receive_prompt(process)
+    start_time = time()
+    process = session.send_prompt(info + request)
+    output = session.receive_prompt(process)
+    record = self._record_call(start_time, output, session, step, **kwargs)
     logger.debug(f"received message: {output}")
-
-    if not output: return []
-    return self._process_outputs(output, **kwargs)
+    return output, record
+
+
+  # start_time부터 대화 세션 session에서 수행한 LLM 호출의 결과 output과 모델 사용량을 측정 기록에 추가하고 반환합니다.
+  def _record_call(self, start_time: float, output: str, session=None, step=None, **kwargs) -> CallRecord:
+    usage = (session or self.session).get_usage()
+    record = CallRecord(
+      tool=self.tool,
+      fct=self._get_target(**kwargs),
+      iteration=step or self.step,
+      model=self.model.get_signature().get("model", ""),
+      input_tokens=usage.get("input_tokens", 0),
+      output_tokens=usage.get("output_tokens", 0),
+      cached_tokens=usage.get("cached_tokens", 0),
+      queue=usage.get("queue", 0.0),
+      wait=usage.get("wait", 0.0),
+      latency=time() - start_time,
+      success=bool(output),
+      cached=usage.get("cached", False),
+      retries=usage.get("retries", 0),
+      hedged=usage.get("hedged", False))
+    Metrics.record(record)
+    if self.speculation: self.speculation.records.append(record)
+    self.last_record = record
+    return record
+
+
+  # 측정 기록에 사용하는 대상 함수 이름을 반환합니다.
+  def _get_target(self, fct="", **kwargs) -> str:
+    return fct
 
 
   # 이전 수행 결과 feedback을 바탕으로 LLM API의 프롬프트로 제공할 정보 및 요청 문자열 리스트를 반환합니다.
+  # more가 참이면 처음 요청을 다시 보내지 않고 이전 결과와 다른 결과를 더 요청합니다.
   @abstractmethod # 구체화 시 구현 필요.
-  def _generate_queries(self, feedback=None, **kwargs) -> tuple[list[str], list[str]]:
+  def _generate_queries(self, feedback=None, more=False, **kwargs) -> tuple[list[str], list[str]]:
     raise NotImplemented("no query generation implementation")
 
 
@@ -115,6 +286,7 @@ class ToolBaseBuilder():
   def __init__(self):
     self.model = None
     self.iteration = 1
+    self.configs = {}
 
 
   # LLM 모델을 이름 name의 모델로 구성합니다.
@@ -129,6 +301,12 @@ class ToolBaseBuilder():
     return self
 
 
+  # LLM 요청 도구 설정을 configs로 설정합니다.
+  def set_configs(self, configs: dict):
+    self.configs = configs
+    return self
+
+
   # 설정한 정보로 LLM 모델 요청 도구를 반환합니다.
   def build(self) -> ToolBase:
-    return ToolBase(self.model, self.iteration)
+    return ToolBase(self.model, self.iteration, self.configs)
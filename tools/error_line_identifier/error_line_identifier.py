@@ -6,6 +6,7 @@ from typing_extensions import override
 from common.errorline import ErrorLine
 from tools.base import ToolBase, ToolBaseBuilder
 from util.codeinfo import CodeInfo
+from util.context_slicer import ContextSlicer
 from util.filesys import read_file
 
 
@@ -13,34 +14,63 @@ from util.filesys import read_file
 class Format(Enum):
   Code = "### {}\n```python\n{}\n```"
   Query = "Find {} codes with potential to raise TypeError in '{}'."
+  Candidates = "### Candidate lines\nStatic analysis found the lines below, ranked by risk. Consider only these lines.\n{}"
+  Candidate = "- {}: {}"
 
 
 # 잠재적인 오류 줄 탐지기 클래스.
 class ErrorLineIderntifier(ToolBase):
 
+  tool = "identifier"
+
   def __init__(self, info: CodeInfo, path: Path):
     self.info = info
     self.path = path
+    self.functions = []
+    self.slicer = None
+    self.candidates = {}
+    self.source = ""
+
+
+  # 탐지할 코드 문자열을 반환합니다. 나눈 코드 조각 source가 있으면 조각을 반환합니다.
+  # 도구 설정에 "context_budget"이 있고 관심 함수가 있으면 파일 전체 대신 관심 함수가 참조하는 코드만 반환합니다.
+  def _read_source(self) -> str:
+    if self.source: return self.source
+    if self.slicer and self.functions and "context_budget" in self.configs:
+      sliced = self.slicer.slice(self.functions, self.configs["context_budget"])
+      if self.path in sliced: return sliced[self.path]
+    return "".join(read_file(self.path))
 
 
   # 이전 수행 결과 feedback을 바탕으로 LLM API의 프롬프트로 제공할 정보 및 요청 문자열 리스트를 반환합니다.
   @override
-  def _generate_queries(self, feedback: bool) -> tuple[list[str], list[str]]:
+  def _generate_queries(self, feedback: bool, more=False) -> tuple[list[str], list[str]]:
     info, request = [], []
 
-    # 피드백이 없으면 코드 정보, 생성 요청 반환.
-    if not feedback:
-      raw_code = "".join(read_file(self.path))
+    # 피드백이 없고 이어서 요청하지 않으면 코드 정보, 생성 요청 반환.
+    if not feedback and not more:
+      raw_code = self._read_source()
       info = [Format.Code.value.format(self.path, raw_code)]
       request = [Format.Query.value.format("all", self.path)]
+
+      # 정적 선별 후보가 있으면 후보 줄로 탐지 범위 축소.
+      lines = [Format.Candidate.value.format(fct, cand.to_summary())
+               for fct, cands in self.candidates.items() for cand in cands]
+      if lines: info.append(Format.Candidates.value.format("\n".join(lines)))
       return info, request
     
-    # 피드백이 있으면 수정 요청만 반환.
+    # 피드백이 있거나 이어서 요청하면 추가 탐지 요청만 반환.
     else:
       request = [Format.Query.value.format("more", self.path)]
       return info, request
     
     
+  # 측정 기록에 사용하는 대상 함수 이름을 반환합니다.
+  @override
+  def _get_target(self, **kwargs) -> str:
+    return ", ".join(self.functions) if self.functions else str(self.path)
+
+
   # LLM API의 수행 결과 out을 처리하여 반환합니다.
   @override
   def _process_outputs(self, out: str) -> list[ErrorLine]:    
@@ -78,12 +108,35 @@ class ErrorLineIdentifierBuilder(ToolBaseBuilder):
     super().__init__()
     self.info = CodeInfo()
     self.path = ""
+    self.functions = []
+    self.slicer = None
+    self.candidates = {}
+    self.source = ""
 
 
   # 대상 경로를 path로 설정합니다.
   def set_path(self, path: Path):
     self.path = path
     self.info.set_code(path)
+    self.slicer = ContextSlicer([path])
+    return self
+
+
+  # 관심 함수 이름 리스트를 fcts로 설정합니다.
+  def set_functions(self, fcts: list[str]):
+    self.functions = fcts
+    return self
+
+
+  # 함수 별 정적 선별 후보 줄 리스트 dict를 candidates로 설정합니다.
+  def set_candidates(self, candidates: dict):
+    self.candidates = candidates
+    return self
+
+
+  # 파일 전체 대신 탐지할 코드 조각을 source로 설정합니다.
+  def set_source(self, source: str):
+    self.source = source
     return self
 
 
@@ -92,4 +145,9 @@ class ErrorLineIdentifierBuilder(ToolBaseBuilder):
     finder = ErrorLineIderntifier(self.info, self.path)
     finder.model = self.model
     finder.iteration = self.iteration
+    finder.configs = self.configs
+    finder.functions = self.functions
+    finder.slicer = self.slicer
+    finder.candidates = self.candidates
+    finder.source = self.source
     return finder
\ No newline at end of file
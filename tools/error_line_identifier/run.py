@@ -1,12 +1,21 @@
 from argparse import ArgumentParser
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from pathlib import Path
 
 from common.errorline import ErrorLine
 from models.model import ModelFactory
+from tools.base import split_configs
 from tools.error_line_identifier.error_line_identifier import ErrorLineIdentifierBuilder
+from util.context_slicer import ContextSlicer
 from util.filesys import make_directory, read_json, write_json
+from util.logger import Logger, LoggerName
+from util.type_screen import screen
+
+
+# 오류 탐색기 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Tool)
 
 
 # 오류 탐색기 실행 초기 값 열거형 클래스.
@@ -14,19 +23,41 @@ class Default(Enum):
   Model = "response"
   Config_Path = Path("configs/openai/response/error_line_identifier.json")
   Out_DirPath = Path("out")
+  Prescreen_Limit = 20
+  Chunk_Budget = 4000
+  Chunk_Workers = 4
 
 
 # 이름 model과 configs 설정으로 구성한 LLM 모델을 iter 횟수만큼 실행하여
 # 경로 path 코드의 fcts 함수에 대한 TypeError 오류 줄 리스트를 찾습니다.
+# 도구 설정에 "prescreen"이 있으면 정적 분석으로 후보 줄이 없는 함수는 LLM에 요청하지 않습니다.
+# 도구 설정에 "chunk"가 있으면 코드를 함수 경계로 나눈 조각마다 병렬로 탐지한 뒤 합칩니다.
 def run(path: Path, fcts=[], iter=1, model=Default.Model.value, configs={}) -> list[ErrorLine]:
-  finder = (ErrorLineIdentifierBuilder()
-            .set_path(path)
-            .set_model(model, config=configs)
-            .set_iteration(iter)
-            .build())
+  model_configs, tool_configs = split_configs(configs)
+  candidates = {}
+  if "prescreen" in tool_configs:
+    fcts, candidates = _prescreen(path, fcts, tool_configs["prescreen"])
+    if fcts is None: return []
+
+  builder = (ErrorLineIdentifierBuilder()
+              .set_path(path)
+              .set_functions(fcts)
+              .set_candidates(candidates)
+              .set_model(model, config=model_configs)
+              .set_configs(tool_configs)
+              .set_iteration(iter))
+
+  # 코드 조각이 둘 이상이면 조각마다 탐지, 아니면 파일 전체를 한 번에 탐지.
+  chunk_configs = tool_configs.get("chunk")
+  chunks = []
+  if chunk_configs is not None:
+    chunks = ContextSlicer([path]).chunk(chunk_configs.get("budget", Default.Chunk_Budget.value), fcts)
+  if len(chunks) > 1:
+    errorlines = _run_chunks(builder, chunks, candidates, chunk_configs.get("workers", Default.Chunk_Workers.value))
+  else:
+    errorlines = builder.build().run()
 
   # 관심 함수를 설정하지 않으면 그대로 반환.
-  errorlines = finder.run()
   if not fcts: return errorlines
 
   # 관심 함수를 설정하면 관심 없는 함수를 제거하여 반환.
@@ -34,6 +65,40 @@ def run(path: Path, fcts=[], iter=1, model=Default.Model.value, configs={}) -> l
   return filtered
 
 
+# 경로 path 코드의 관심 함수 fcts를 정적 분석 설정 configs로 선별하고, 탐지할 함수 리스트와 프롬프트에 넣을 후보 줄 dict 쌍을 반환합니다.
+# "skip"이면 후보 줄이 없는 함수를 제외하고, 모두 제외되면 함수 리스트로 None을 반환합니다.
+# "narrow"이면 함수마다 점수가 높은 후보 줄을 "limit"개까지 반환합니다.
+def _prescreen(path: Path, fcts: list[str], configs: dict) -> tuple[list[str], dict]:
+  screened = screen(path)
+  targets = fcts or list(screened)
+  limit = configs.get("limit", Default.Prescreen_Limit.value)
+  candidates = {fct: screened[fct][:limit] for fct in targets if screened.get(fct)} if configs.get("narrow") else {}
+  if not configs.get("skip"): return fcts, candidates
+
+  kept = [fct for fct in targets if fct not in screened or screened[fct]]
+  skipped = len(targets) - len(kept)
+  if skipped: logger.info(f"{skipped}/{len(targets)} functions without TypeError candidates skipped")
+  if not kept: return None, {}
+  return (fcts if not fcts and not skipped else kept), candidates
+
+
+# 빌더 builder로 (함수 이름 리스트, 코드) 조각 리스트 chunks마다 탐지기를 만들어 workers개씩 병렬로 실행하고,
+# 중복을 제거한 오류 줄 리스트를 반환합니다. 조각마다 대화와 반복 종료 정책을 따로 가집니다.
+def _run_chunks(builder: ErrorLineIdentifierBuilder, chunks: list, candidates: dict, workers: int) -> list[ErrorLine]:
+  finders = [(builder
+              .set_functions(names)
+              .set_source(code)
+              .set_candidates({fct: cands for fct, cands in candidates.items() if fct in names})
+              .build()) for names, code in chunks]
+  logger.info(f"{len(finders)} chunks identified by {min(workers, len(finders))} workers")
+
+  with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="chunk") as executor:
+    outputs = list(executor.map(lambda finder: finder.run(), finders))
+
+  # 같은 함수, 줄 번호, 코드의 오류 줄은 하나만 남기기.
+  return list(dict.fromkeys(line for lines in outputs for line in lines))
+
+
 # 오류 줄 리스트 lines를 함수 별로 구분하여 dict로 반환합니다.
 def _classify_by_function(lines: list[ErrorLine]) -> dict:
   classified = defaultdict(list)
@@ -0,0 +1,73 @@
+from enum import Enum
+
+
+# 반복 종료 정책 초기 값 열거형 클래스.
+class Default(Enum):
+  Min_Yield = 1.0
+  Min_Yield_Per_Ktoken = 0.0
+  Smoothing = 0.5
+  Min_Calls = 2
+
+
+# LLM 요청 도구의 반복 종료 정책 클래스.
+# 호출마다 새로 찾은 유효한 결과 수와 사용한 토큰 수를 받아 반복을 멈출지 판단합니다.
+class StoppingPolicy:
+
+  # 도구 설정 configs의 "stopping" 항목으로 반복 종료 정책을 만들어 반환합니다. 항목이 없으면 멈추지 않는 정책을 반환합니다.
+  @staticmethod
+  def create(configs: dict):
+    if "stopping" not in configs: return StoppingPolicy()
+    return NoveltyPolicy(**configs["stopping"])
+
+
+  # 새로 찾은 유효한 결과 수 found, 사용한 토큰 수 tokens를 기록하고 반복을 멈춰야 하는지 반환합니다.
+  def update(self, found: int, tokens: int) -> bool:
+    return False
+
+
+  # 반복 종료 정책 상태를 한 줄로 요약합니다.
+  def to_summary(self) -> str:
+    return "no stopping policy"
+
+
+# 호출마다 새로 찾은 결과 수가 줄어드는 비율의 지수 이동 평균으로 다음 호출의 기대 이득을 추정하고,
+# 기대 이득이 호출당 min_yield개 또는 1000 토큰당 min_yield_per_ktoken개보다 작으면 멈추는 반복 종료 정책 클래스.
+# 최소 min_calls번은 호출하며, smoothing은 최근 비율의 가중치입니다.
+class NoveltyPolicy(StoppingPolicy):
+
+  def __init__(self, min_yield=Default.Min_Yield.value, min_yield_per_ktoken=Default.Min_Yield_Per_Ktoken.value,
+               smoothing=Default.Smoothing.value, min_calls=Default.Min_Calls.value):
+    self.min_yield = min_yield
+    self.min_yield_per_ktoken = min_yield_per_ktoken
+    self.smoothing = smoothing
+    self.min_calls = min_calls
+    self.calls = 0
+    self.last = None
+    self.decay = None
+    self.expected = 0.0
+    self.expected_per_ktoken = 0.0
+
+
+  # 새로 찾은 유효한 결과 수 found, 사용한 토큰 수 tokens를 기록하고 반복을 멈춰야 하는지 반환합니다.
+  def update(self, found: int, tokens: int) -> bool:
+    self.calls += 1
+
+    # 직전 호출 대비 새 결과 수 비율을 감소율로 반영. 늘어난 호출은 감소하지 않은 것으로 봄.
+    if self.last is not None:
+      ratio = min(1.0, found / self.last) if self.last else float(found > 0)
+      self.decay = ratio if self.decay is None else self.smoothing * ratio + (1 - self.smoothing) * self.decay
+    self.last = found
+
+    # 다음 호출의 기대 이득은 마지막 호출의 새 결과 수에 감소율을 곱한 값.
+    self.expected = found * (self.decay if self.decay is not None else 1.0)
+    self.expected_per_ktoken = self.expected * 1000 / tokens if tokens else 0.0
+
+    if self.calls < self.min_calls: return False
+    if self.expected < self.min_yield: return True
+    return bool(tokens) and self.expected_per_ktoken < self.min_yield_per_ktoken
+
+
+  # 반복 종료 정책 상태를 한 줄로 요약합니다.
+  def to_summary(self) -> str:
+    return (f"expected {self.expected:.2f} new items per call, "
+            f"{self.expected_per_ktoken:.2f} per 1k tokens after {self.calls} calls")
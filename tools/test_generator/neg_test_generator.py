@@ -5,7 +5,6 @@ from typing_extensions import override
 from common.errorline import ErrorLine
 from common.function import Function
 from tools.test_generator.test_generator import TestGenerator, TestGeneratorBuidler
-from util.filesys import read_file
 
 
 # LLM 요청 메시지 형식 열거형 클래스.
@@ -13,6 +12,7 @@ class Format(Enum):
   Code = "### {}\n```python\n{}\n```"
   Init_Query = "Write {} tests that trigger {} at `{}`, line {} of {}."
   Fix_Query = "Rewrite test codes to trigger {} in '{}'."
+  More_Query = "Write {} more tests, different from the previous ones, that trigger {} at `{}`, line {} of {}."
   Nothing = "{} don't trigger any error."
   Other = "{} triggers `{}`."
   Unlocated = "{} triggers `{}` but not in '{}'."
@@ -28,15 +28,21 @@ class Type(Enum):
 # 주어진 지점에서 오류가 발생하는 Negative 테스트케이스 생성기 클래스.
 class NegativeTestGenerator(TestGenerator):
 
+  tool = "neg"
+
   # LLM API의 프롬프트로 제공할 정보 및 요청 문자열 리스트를 반환합니다.
   @override
-  def _generate_queries(self, feedback: dict, fct: str, line: ErrorLine, **kwargs) -> list[str]:
+  def _generate_queries(self, feedback: dict, more=False, fct: str = "", line: ErrorLine = None, **kwargs) -> list[str]:
     info, request = [], []
 
+    # 피드백 없이 이어서 요청하면 이전과 다른 테스트 추가 생성 요청을 반환.
+    if more and not feedback:
+      str_targets = ", ".join(self.pass_type)
+      request.append(Format.More_Query.value.format(self.candidates, str_targets, line.code, line.lineno, line.method))
+
     # 피드백이 없으면 코드, 자료, 생성 요청을 반환.
-    if not feedback:
-      for p in self.src:
-        raw_code = "".join(read_file(p))
+    elif not feedback:
+      for p, raw_code in self._read_sources(fct):
         info.append(Format.Code.value.format(p, raw_code))
 
       for key, val in self.res.items():
@@ -106,4 +112,6 @@ class NegativeTestGeneratorBuidler(TestGeneratorBuidler):
                                       self.src, self.res, self.candidates, self.targets, self.name)
     generator.model = self.model
     generator.iteration = self.iteration
+    generator.configs = self.configs
+    generator.slicer = self.slicer
     return generator
\ No newline at end of file
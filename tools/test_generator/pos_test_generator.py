@@ -12,6 +12,7 @@ class Format(Enum):
   Code = "### {}\n```python\n{}\n```"
   Init_Query = "Write {} tests not to trigger any error in '{}'."
   Fix_Query = "Rewrite test codes not to trigger any error in '{}'."
+  More_Query = "Write {} more tests, different from the previous ones, not to trigger any error in '{}'."
   Errorlines = " at `{}`, line {} of '{}'"
   Error = "{} triggers `{}`."
 
@@ -26,16 +27,21 @@ class Type(Enum):
 # 오류가 발생하지 않는 Positive 테스트케이스 생성기 클래스.
 class PositiveTestGenerator(TestGenerator):
 
+  tool = "pos"
+
   # LLM API의 프롬프트로 제공할 정보 및 요청 문자열 리스트를 반환합니다.
   @override
-  def _generate_queries(self, feedback: dict, fct: str, **kwargs) -> list[str]:
+  def _generate_queries(self, feedback: dict, more=False, fct: str = "", **kwargs) -> list[str]:
     info, request = [], []
     
+    # 피드백 없이 이어서 요청하면 이전과 다른 테스트 추가 생성 요청을 반환.
+    if more and not feedback:
+      request.append(Format.More_Query.value.format(self.candidates, fct))
+
     # 피드백이 없으면 코드, 생성 요청을 반환.
-    if not feedback:
-      for p in self.src:
-        raw_code = "".join(read_file(p))
-        info.append(Format.Code.value.format(self.src[0], raw_code))
+    elif not feedback:
+      for p, raw_code in self._read_sources(fct):
+        info.append(Format.Code.value.format(p, raw_code))
 
       for r in self.res:
         raw_res = "".join(read_file(p)[:10])
@@ -97,4 +103,6 @@ class PositiveTestGeneratorBuilder(TestGeneratorBuidler):
                                       self.src, self.res, self.candidates, self.targets, self.name)
     generator.model = self.model
     generator.iteration = self.iteration
+    generator.configs = self.configs
+    generator.slicer = self.slicer
     return generator
\ No newline at end of file
@@ -1,16 +1,26 @@
 from argparse import ArgumentParser
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from enum import Enum
+from functools import partial
 from pathlib import Path
 
 from models.model import ModelFactory
 from common.errorline import ErrorLine
 from common.function import Function
+from tools.base import Speculation
 from tools.test_generator.run_neg import run as run_neg
 from tools.test_generator.run_pos import run as run_pos
-from util.filesys import read_json, write_file, write_json, make_directory
+from util.filesys import read_file, read_json, write_file, write_json, make_directory
+from util.journal import Journal
+from util.logger import Logger, LoggerName
+from util.manifest import hash_configs
 from validation.framework import TestFrameworkFactory
 
 
+# 테스트 생성기 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Tool)
+
+
 # 테스트 생성기 실행 초기 값 열거형 클래스.
 class Default(Enum):
   Model = "response"
@@ -23,17 +33,80 @@ class Default(Enum):
 
 # 코드 경로 리스트 src, 사용자 정의 정보 딕셔녀리 res, 오류 줄 리스트 lines에 대하여
 # n개의 유효한 테스트를 찾거나 최대 iter번 수행하기 전까지 cand개씩 Positive 테스트를 만들고 유효한 테스트를 반환합니다.
+# speculative이면 Positive 테스트를 Negative 테스트와 동시에 만들고, Negative 테스트가 없으면 취소하고 결과를 버립니다.
+# 작업 기록 journal이 주어지면 Negative, Positive 테스트 생성을 작업으로 기록하고 완료한 작업은 다시 수행하지 않습니다.
+# 작업 이름에는 코드와 생성 설정의 해시를 포함하므로 설정을 바꾸면 다시 수행합니다.
 def run(src: list[Path], res: dict, lines: list[ErrorLine], iter=1, cand=3, n=3, p=7,
-        model=Default.Model.value, neg_conf={}, pos_conf={}, frame=Default.Framework.value, frame_conf={}) -> tuple[list[Function], list[Function]]:
-  neg_tests = run_neg(src, lines, res, iter, cand, n,
-                      model, neg_conf, frame, frame_conf)
+        model=Default.Model.value, neg_conf={}, pos_conf={}, frame=Default.Framework.value, frame_conf={},
+        speculative=False, journal: Journal = None) -> tuple[list[Function], list[Function]]:
+  fct = lines[0].method if lines else ""
+  shared = {"src": {str(path): "".join(read_file(path) or []) for path in src}, "res": res,
+            "lines": [line.to_dict() for line in lines], "iter": iter, "cand": cand, "model": model,
+            "frame": frame, "frame_conf": frame_conf}
+  neg_task = f"neg:{src[0]}:{fct}:{hash_configs(**shared, num=n, conf=neg_conf)}"
+  pos_task = f"pos:{src[0]}:{fct}:{hash_configs(**shared, num=p, conf=pos_conf)}"
+  neg = partial(run_neg, src, lines, res, iter, cand, n, model, neg_conf, frame, frame_conf)
+  pos = partial(run_pos, src, lines, res, iter, cand, p, model, pos_conf, frame, frame_conf)
+
+  # 이미 완료한 Negative 테스트 생성은 추측 실행하지 않음.
+  speculation = None
+  if speculative and not (journal and journal.is_done(neg_task)):
+    speculation = Speculation()
+    pos = partial(_speculate, pos, speculation)
+
+  if journal:
+    neg = _journaled(journal, neg_task, neg)
+    pos = _journaled(journal, pos_task, pos)
+
+  if speculation:
+    return _run_speculative(neg, pos, speculation)
+
+  neg_tests = neg()
   if len(neg_tests) == 0: return [], []
   
-  pos_tests = run_pos(src, lines, res, iter, cand, p,
-                      model, pos_conf, frame, frame_conf)
+  pos_tests = pos()
   return neg_tests, pos_tests
 
 
+# 테스트 생성 함수 fct를 작업 기록 journal의 작업 task로 실행하는 함수를 반환합니다.
+def _journaled(journal: Journal, task: str, fct: partial) -> partial:
+  dump = lambda tests: [test.to_dict() for test in tests]
+  load = lambda tests: [Function.from_dict(test) for test in tests]
+  return partial(journal.run, task, fct, dump=dump, load=load)
+
+
+# 추측 실행 speculation으로 Positive 테스트 생성 pos를 실행하고 테스트 리스트를 반환합니다.
+# 취소되면 중간 결과가 완료한 결과로 기록되지 않도록 예외를 발생시킵니다.
+def _speculate(pos: partial, speculation: Speculation) -> list[Function]:
+  tests = pos(speculation=speculation)
+  if speculation.is_cancelled():
+    raise CancelledError("speculative positive generation cancelled")
+  return tests
+
+
+# Positive 테스트 생성 pos를 Negative 테스트 생성 neg와 동시에 시작하고 두 테스트 리스트 쌍을 반환합니다.
+# Negative 테스트가 없으면 추측 실행 speculation을 취소하고, 이미 사용한 토큰과 비용을 낭비로 기록합니다.
+def _run_speculative(neg: partial, pos: partial, speculation: Speculation) -> tuple[list[Function], list[Function]]:
+  with ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative-pos") as executor:
+    pos_future = executor.submit(pos)
+    try:
+      neg_tests = neg()
+    except BaseException:
+      speculation.discard()
+      raise
+
+    if neg_tests:
+      return neg_tests, pos_future.result()
+
+    # 진행 중인 호출이 끝나면 Positive 테스트 생성이 멈추므로 기다린 뒤 낭비 기록.
+    speculation.cancel()
+    pos_future.exception()
+    wasted = speculation.discard()
+    logger.info(f"speculative positive generation discarded: {wasted['calls']} calls, "
+                f"{wasted['wasted_tokens']} tokens, ${wasted['wasted_cost']:.4f} wasted")
+    return [], []
+
+
 def main():
   # 선택 가능한 모델, 테스트 프레임워크 리스트 구성.
   available_models = ModelFactory.get_keys()
@@ -79,6 +152,8 @@ def main():
   parser.add_argument("-o", "--out", metavar="OUTPUT_PATH", type=Path,
                       default=Default.Out_DirPath.value,
                       help="output path")
+  parser.add_argument("-sp", "--speculative", action="store_true",
+                      help="generate positive tests concurrently with negative tests")
   args = parser.parse_args()
 
   # 파싱한 인자 연결.
@@ -106,7 +181,7 @@ def main():
   errorlines = ErrorLine.from_json(read_json(err))
   fct = errorlines[0].method if errorlines else ""
   neg_tests, pos_tests = run(src, res, errorlines, iter, gen, n_num, p_num,
-                  model, model_neg_config, model_pos_config, fw, fw_config)
+                  model, model_neg_config, model_pos_config, fw, fw_config, args.speculative)
 
   # 테스트케이스 기록.
   tests_dirpath = out/"tests"
@@ -1,10 +1,12 @@
 from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from enum import Enum
 from pathlib import Path
 
 from common.errorline import ErrorLine
 from common.function import Function
 from models.model import ModelFactory
+from tools.base import Speculation, split_configs
 from tools.test_generator.neg_test_generator import NegativeTestGeneratorBuidler
 from util.filesys import read_json, write_file, write_json, make_directory
 from util.logger import Logger, LoggerName
@@ -21,40 +23,67 @@ class Default(Enum):
   Model_Config_Path = Path("configs/openai/response/neg_test_generator.json")
   Framework_Config_Path = Path()
   Out_DirPath = Path("out")
+  Fanout = 1
 
 
 # 코드 경로 리스트 src, 사용자 정의 정보 딕셔너리 res, 오류 줄 리스트 lines에 대하여
 # n개의 유효한 테스트를 찾거나 최대 iter번 수행하기 전까지 cand개씩 Negative 테스트를 만들고 유효한 테스트를 반환합니다.
+# 오류 줄은 도구 설정 "fanout"개씩 동시에 처리하고, 충분한 종류의 테스트를 찾으면 남은 처리를 취소합니다.
 def run(src: list[Path], lines: list[ErrorLine], res={}, iter=1, cand=3, n=3,
         model=Default.Model.value, model_conf={}, frame=Default.Framework.value, frame_conf={}) -> list[Function]:
-  generator = (NegativeTestGeneratorBuidler()
-               .add_pass_type("TypeError")
-               .set_paths(src)
-               .set_res(res)
-               .set_iteration(iter)
-               .set_candidates(cand)
-               .set_targets(n)
-               .set_model(model, config=model_conf)
-               .set_framework(frame, config=frame_conf)
-               .set_name(f"{lines[0].method}_neg")
-               .build())
-
-  candidates = {}
-  logger.info("Running negative testcase generation")
-
-  for line in lines:
+  model_conf, tool_conf = split_configs(model_conf)
+  fanout = max(1, tool_conf.get("fanout", Default.Fanout.value))
+  speculation = Speculation()
+
+  # 오류 줄마다 별도의 대화 세션, 테스트 파일 이름을 쓰는 생성기로 테스트 생성.
+  def generate(index: int, line: ErrorLine) -> list[Function]:
+    generator = (NegativeTestGeneratorBuidler()
+                 .add_pass_type("TypeError")
+                 .set_paths(src)
+                 .set_res(res)
+                 .set_iteration(iter)
+                 .set_candidates(cand)
+                 .set_targets(n)
+                 .set_model(model, config=model_conf)
+                 .set_configs(tool_conf)
+                 .set_framework(frame, config=frame_conf, preload=src)
+                 .set_name(f"{src[0].with_suffix('').as_posix()}_{line.method}_neg{index + 1}_")
+                 .build())
     logger.info(f"target: {line.method}: {line.lineno}:: {line.code}")
-    generated = generator.run(fct=line.method, line=line)
+    return generator.run(speculation, fct=line.method, line=line)
 
-    # 생성한 테스트가 없으면 넘어가기.
-    if not generated: continue
+  results, codes = {}, set()
+  logger.info("Running negative testcase generation")
 
-    for fct in generated:
+  with ThreadPoolExecutor(max_workers=fanout, thread_name_prefix="neg-line") as executor:
+    futures = {executor.submit(generate, i, line): i for i, line in enumerate(lines)}
+    pending = set(futures)
+    try:
+      while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          if future.cancelled(): continue
+          results[futures[future]] = future.result()
+          codes.update(fct.result.code for fct in results[futures[future]])
+
+        # 충분한 종류의 테스트를 찾으면 남은 처리 취소.
+        if len(codes) >= n and not speculation.is_cancelled():
+          logger.info(f"negative testcase generation stopped: {len(codes)} error kinds found")
+          speculation.cancel()
+          for future in pending:
+            future.cancel()
+    except BaseException:
+      speculation.cancel()
+      for future in pending:
+        future.cancel()
+      raise
+
+  # 오류 줄 순서대로 테스트 후보 병합.
+  candidates = {}
+  for i in sorted(results):
+    for fct in results[i]:
       candidates.setdefault(fct.result.code, []).append(fct)
 
-    # 충분한 종류의 테스트를 찾으면 중단.
-    if len(candidates) >= n: break
-
   # 테스트 후보가 하나도 없으면 중단.
   if not candidates: return []
 
@@ -5,6 +5,7 @@ from pathlib import Path
 from common.errorline import ErrorLine
 from common.function import Function
 from models.model import ModelFactory
+from tools.base import Speculation, split_configs
 from tools.test_generator.pos_test_generator import PositiveTestGeneratorBuilder
 from util.filesys import make_directory, read_json, write_file, write_json
 from util.logger import Logger, LoggerName
@@ -25,9 +26,12 @@ class Default(Enum):
 
 # 코드 경로 리스트 src, 사용자 정의 정보 딕셔너리 res, 함수 fct에 대하여
 # n개의 유효한 테스트를 찾거나 최대 iter번 수행하기 전까지 cand개씩 Positive 테스트를 만들고 유효한 테스트를 반환합니다.
+# 추측 실행 speculation이 주어지면 취소될 때 생성을 멈춥니다.
 def run(src: list[Path], lines: list[ErrorLine], res={}, iter=1, cand=3, n=3,
-        model=Default.Model.value, model_conf={}, frame=Default.Framework.value, frame_conf={}) -> list[Function]:
+        model=Default.Model.value, model_conf={}, frame=Default.Framework.value, frame_conf={},
+        speculation: Speculation = None) -> list[Function]:
   fct = lines[0].method
+  model_conf, tool_conf = split_configs(model_conf)
   generator = (PositiveTestGeneratorBuilder()
                .add_pass_type("None")
                .set_paths(src)
@@ -36,12 +40,13 @@ def run(src: list[Path], lines: list[ErrorLine], res={}, iter=1, cand=3, n=3,
                .set_candidates(cand)
                .set_targets(n)
                .set_model(model, config=model_conf)
-               .set_framework(frame, config=frame_conf)
-               .set_name(f"{fct}_pos")
+               .set_configs(tool_conf)
+               .set_framework(frame, config=frame_conf, preload=src)
+               .set_name(f"{src[0].with_suffix('').as_posix()}_{fct}_pos")
                .build())
 
   logger.info("Running positive testcase generation")
-  generated = generator.run(fct=fct)
+  generated = generator.run(speculation, fct=fct)
 
   # 생성한 테스트가 없으면 빈 리스트 반환.
   if not generated: return []
@@ -1,16 +1,21 @@
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from json import loads
 from pathlib import Path
 from re import search
+from time import time
 from typing_extensions import override
 
 from common.function import Function
 from tools.base import ToolBase, ToolBaseBuilder
 
-from util.filesys import make_directory, write_file
+from util.context_slicer import ContextSlicer
+from util.filesys import read_file, write_file
+from util.json_stream import JsonArrayStreamParser
 from util.logger import Logger, LoggerName
 from util.codeinfo import CodeInfo
+from util.workspace import Workspace
 from validation.framework import TestFrameworkFactory
 
 
@@ -19,7 +24,7 @@ logger = Logger().get_logger(LoggerName.Tool)
 
 # 오류 탐색기 실행 초기 값.
 class Default(Enum):
-  Test_DirPath = Path("test")
+  Test_Prefix = "test_"
 
 
 # 테스트케이스 생성기 클래스.
@@ -37,18 +42,64 @@ class TestGenerator(ToolBase):
     
     self.name = name
     self.count = 1
+    self.slicer = None
+
+
+  # 함수 fct의 테스트 생성에 필요한 (경로, 코드) 리스트를 반환합니다.
+  # 도구 설정에 "context_budget"이 있으면 파일 전체 대신 fct가 참조하는 코드만 토큰 예산 안에서 반환합니다.
+  def _read_sources(self, fct: str) -> list[tuple[Path, str]]:
+    if self.slicer and "context_budget" in self.configs:
+      sliced = self.slicer.slice([fct], self.configs["context_budget"])
+      if sliced: return list(sliced.items())
+    return [(p, "".join(read_file(p))) for p in self.src]
+
+
+  # 이전 수행 결과 feedback을 바탕으로 LLM 요청 도구를 1번 실행하고 결과 리스트를 반환합니다.
+  # 스트림 모델이면 생성이 끝난 테스트부터 생성과 동시에 검증합니다.
+  @override
+  def run_once(self, feedback=None, **kwargs) -> list[Function]:
+    if not self.model.stream:
+      return super().run_once(feedback, **kwargs)
+
+    info, request = self._generate_queries(feedback, **kwargs)
+    str_request = " ".join(request)
+    logger.info(f"send message (stream): {str_request}")
+
+    parser, futures, chunks = JsonArrayStreamParser("codes"), [], []
+    start_time = time()
+    with ThreadPoolExecutor(max_workers=max(1, self.candidates)) as executor:
+      for chunk in self.session.stream_prompt(info + request):
+        chunks.append(chunk)
+        for item in parser.feed(chunk):
+          name = f"{Default.Test_Prefix.value}{self.name}{self.count}_{len(futures) + 1}.py"
+          functions = Function.from_json({"codes": [item]})
+          futures.append(executor.submit(self._test_functions, functions, name))
+      self._record_call(start_time, "".join(chunks), **kwargs)
+      pytest_functions = [fct for future in futures for fct in future.result()]
+
+    logger.debug(f"received {len(futures)} streamed tests")
+    self.count += 1
+    return pytest_functions
 
 
   # LLM API의 수행 결과 out을 처리하여 반환합니다.
   @override
   def _process_outputs(self, out: str, **kwargs) -> list[Function]:
-    path = Default.Test_DirPath.value/f"test_{self.name}{self.count}.py"
+    name = f"{Default.Test_Prefix.value}{self.name}{self.count}.py"
     functions = Function.from_json(loads(out))
-    
-    make_directory(Default.Test_DirPath.value)
-    write_file(path, "\n\n".join(fct.to_py() for fct in functions))
-    errors = self.framework.test(path)
+    pytest_functions = self._test_functions(functions, name)
     self.count += 1
+    return pytest_functions
+
+
+  # 함수 리스트 functions를 고유한 작업 공간의 이름 name 테스트 파일로 실행하고 오류를 매핑한 함수 리스트를 반환합니다.
+  # 결과를 받지 못한 함수가 있으면 작업 공간을 실패한 검증으로 표시합니다.
+  def _test_functions(self, functions: list[Function], name: str) -> list[Function]:
+    with Workspace(Path(name).stem + "_") as workspace:
+      path = workspace/name
+      write_file(path, "\n\n".join(fct.to_py() for fct in functions))
+      errors = self.framework.test(path)
+      if len(errors) < len(functions): workspace.fail()
     
     # 함수마다 대응하는 오류 매핑.
     pytest_functions = []
@@ -91,6 +142,7 @@ class TestGenerator(ToolBase):
 class TestGeneratorBuidler(ToolBaseBuilder):
 
   def __init__(self):
+    super().__init__()
     self.pass_type = []
     self.info = CodeInfo()
     self.framework = None
@@ -102,6 +154,7 @@ class TestGeneratorBuidler(ToolBaseBuilder):
     
     self.name = ""
     self.count = 1
+    self.slicer = None
 
 
   # 통과 오류 타입 리스트에 이름 name의 오류를 추가합니다.
@@ -120,6 +173,7 @@ class TestGeneratorBuidler(ToolBaseBuilder):
   def set_paths(self, paths: list[Path]):
     self.src = paths
     self.info.set_code(paths[0])
+    self.slicer = ContextSlicer(paths)
     return self
 
 
@@ -141,9 +195,9 @@ class TestGeneratorBuidler(ToolBaseBuilder):
     return self
   
 
-  # 테스트 제목을 주어진 이름 name으로 설정합니다.
+  # 테스트 제목을 주어진 이름 name으로 설정합니다. 경로 구분자와 점은 밑줄로 바꿉니다.
   def set_name(self, name: str):
-    self.name = name.replace(".", "_")
+    self.name = name.replace(".", "_").replace("/", "_")
     return self
   
 
@@ -4,6 +4,7 @@ from importlib import import_module
 from inspect import getsourcelines
 from os.path import sep
 from pathlib import Path
+from threading import Lock
 
 from util.function_visitor import FunctionVisitor
 from util.logger import Logger, LoggerName
@@ -27,16 +28,34 @@ class FunctionAttribute:
 
 
 # 실제 코드 위치 검색기 클래스.
+# 코드 파일의 함수 별 코드는 (경로, 수정 시각)마다 한 번만 구성하여 모든 코드 조회기가 공유합니다.
 class CodeInfo():
 
+  _cache = {}
+  _lock = Lock()
+
   def __init__(self):
     self.codes = {}
 
 
   # 경로 path의 코드에서 함수 별 코드를 설정합니다.
   def set_code(self, path: Path):
+    key = (str(path), Path(path).stat().st_mtime_ns)
+    with CodeInfo._lock:
+      codes = CodeInfo._cache.get(key)
+    if codes is None:
+      codes = CodeInfo._read_codes(path)
+      with CodeInfo._lock:
+        CodeInfo._cache[key] = codes
+    self.codes.update(codes)
+
+
+  # 경로 path의 코드에서 함수 별 코드를 읽고 dict로 반환합니다.
+  @staticmethod
+  def _read_codes(path: Path) -> dict:
     module = import_module(path.with_suffix('').as_posix().replace(sep, '.'))
 
+    codes = {}
     for name in FunctionVisitor().get_attribute_names(path):      
       attrs = name.split(".") if "." in name else [name]
       try:
@@ -48,8 +67,9 @@ class CodeInfo():
         logger.warning(f"no '{name}' attribute")
         continue
 
-      codes, lineno = getsourcelines(attr)
-      self.codes[name] = FunctionAttribute(CodeInfo._get_complete_codes(codes), lineno, lineno + len(codes) - 1)
+      lines, lineno = getsourcelines(attr)
+      codes[name] = FunctionAttribute(CodeInfo._get_complete_codes(lines), lineno, lineno + len(lines) - 1)
+    return codes
 
 
   # 코드 리스트 codes에서 구문이 완전한 코드 문장의 첫 위치, 내용 쌍을 dict로 반환합니다.
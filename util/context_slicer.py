@@ -0,0 +1,264 @@
+from ast import AnnAssign, Assign, AsyncFunctionDef, Attribute, ClassDef, FunctionDef, Import, ImportFrom, Load, Name, parse, walk
+from collections import deque
+from enum import Enum
+from pathlib import Path
+from threading import Lock
+
+from util.filesys import read_file
+from util.logger import Logger, LoggerName
+
+
+# 코드 조각 추출기 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 코드 조각 추출기 초기 값 열거형 클래스.
+class Default(Enum):
+  Budget = 4000
+  Chars_Per_Token = 4
+  Omitted = "..."
+
+
+# 코드 파일 하나의 최상위 정의 색인 클래스.
+# 색인은 (경로, 수정 시각)마다 한 번만 만들어 모든 추출기가 공유합니다.
+class ModuleIndex:
+
+  _cache = {}
+  _lock = Lock()
+
+  def __init__(self, path: Path):
+    self.path = path
+    self.lines = "".join(read_file(path) or []).split("\n")
+    self.imports = {}
+    self.definitions = {}
+    self.classes = {}
+
+    tree = parse("\n".join(self.lines))
+    for node in tree.body:
+      # import 구문은 가져온 이름마다 기록.
+      if isinstance(node, (Import, ImportFrom)):
+        for alias in node.names:
+          name = alias.asname or alias.name.split(".")[0]
+          self.imports[name] = node
+      # 함수, 클래스, 전역 변수 정의 기록.
+      elif isinstance(node, (FunctionDef, AsyncFunctionDef)):
+        self.definitions[node.name] = node
+      elif isinstance(node, ClassDef):
+        self.definitions[node.name] = node
+        self.classes[node.name] = {child.name: child for child in node.body
+                                   if isinstance(child, (FunctionDef, AsyncFunctionDef))}
+        for child in node.body:
+          for target in _get_targets(child):
+            self.classes[node.name].setdefault(target, child)
+      else:
+        for target in _get_targets(node):
+          self.definitions[target] = node
+
+
+  # 경로 path의 공유 색인을 반환합니다. 파일이 바뀌었으면 새로 만듭니다.
+  @classmethod
+  def get(cls, path: Path):
+    key = (str(path), Path(path).stat().st_mtime_ns)
+    with cls._lock:
+      index = cls._cache.get(key)
+    if index is None:
+      index = cls(path)
+      with cls._lock:
+        cls._cache[key] = index
+    return index
+
+
+# 대입 구문 node가 정의하는 이름 리스트를 반환합니다.
+def _get_targets(node) -> list[str]:
+  if isinstance(node, Assign):
+    return [target.id for target in node.targets if isinstance(target, Name)]
+  if isinstance(node, AnnAssign) and isinstance(node.target, Name):
+    return [node.target.id]
+  return []
+
+
+# 구문 node의 첫 줄, 마지막 줄 번호 쌍을 반환합니다. 데코레이터를 포함합니다.
+def _get_range(node) -> tuple[int, int]:
+  start = min([node.lineno] + [dec.lineno for dec in getattr(node, "decorator_list", [])])
+  return start, node.end_lineno
+
+
+# 정의 구문 node의 본문을 제외한 머리 줄 번호 쌍을 반환합니다.
+def _get_header_range(node) -> tuple[int, int]:
+  start, _ = _get_range(node)
+  body_start, _ = _get_range(node.body[0])
+  return start, max(node.lineno, body_start - 1)
+
+
+# 대상 함수와 그 함수가 참조하는 클래스, import, 호출 함수, 타입만 모아 프롬프트 코드를 구성하는 추출기 클래스.
+# 대상 함수에서 가까운 참조부터 토큰 예산 안에서 추가합니다.
+class ContextSlicer:
+
+  def __init__(self, paths: list[Path]):
+    self.paths = list(paths)
+    self.indexes = {}
+    for path in self.paths:
+      try:
+        self.indexes[path] = ModuleIndex.get(path)
+      except (SyntaxError, OSError):
+        logger.warning(f"context slicing ignored: can't parse {path}")
+
+
+  # 함수 이름 리스트 targets에 필요한 코드 조각을 토큰 예산 budget 안에서 구성하고 경로 별 코드 dict로 반환합니다.
+  # 첫 경로의 대상 함수는 예산과 관계없이 포함합니다.
+  def slice(self, targets: list[str], budget=Default.Budget.value) -> dict:
+    if not self.paths or self.paths[0] not in self.indexes:
+      return {}
+
+    ranges = {path: set() for path in self.indexes}
+    visited, used = set(), 0
+    queue = deque((self.paths[0], target, True) for target in targets)
+
+    while queue:
+      path, name, required = queue.popleft()
+      if (path, name) in visited: continue
+      visited.add((path, name))
+
+      units, references = self._get_unit(path, name)
+      if not units: continue
+
+      # 예산을 넘는 참조 조각은 넘어가기.
+      new_units = [unit for unit in units if unit not in ranges[path]]
+      cost = sum(self._count_tokens(path, unit) for unit in new_units)
+      if not required and used + cost > budget: continue
+
+      ranges[path].update(new_units)
+      used += cost
+      queue.extend((ref_path, ref_name, False) for ref_path, ref_name in references)
+
+    logger.debug(f"context sliced: {used} tokens for {', '.join(targets)}")
+    return {path: self._to_code(path, units) for path, units in ranges.items() if units}
+
+
+  # 첫 경로 코드를 클래스, 함수 경계로 나누어 토큰 예산 budget 안의 (함수 이름 리스트, 코드) 조각 리스트로 반환합니다.
+  # 모든 조각은 import 구문, 전역 변수, 클래스 정의 줄과 클래스 변수로 이루어진 공통 머리를 포함하며,
+  # 예산보다 큰 함수는 혼자 한 조각이 됩니다. 함수 이름 리스트 targets가 있으면 그 함수만 나눕니다.
+  def chunk(self, budget=Default.Budget.value, targets=[]) -> list[tuple[list[str], str]]:
+    if not self.paths or self.paths[0] not in self.indexes:
+      return []
+
+    # 함수 정의는 조각 단위로, 나머지 최상위 구문은 공통 머리로 구분.
+    path = self.paths[0]
+    index, header, units = self.indexes[path], set(), []
+    for node in {id(node): node for node in index.imports.values()}.values():
+      header.add(_get_range(node))
+    for name, node in index.definitions.items():
+      if isinstance(node, (FunctionDef, AsyncFunctionDef)):
+        units.append(([name], _get_range(node)))
+      elif isinstance(node, ClassDef):
+        header.add(_get_header_range(node))
+        for child in node.body:
+          if isinstance(child, (FunctionDef, AsyncFunctionDef)):
+            units.append(([f"{name}.{child.name}"], _get_range(child)))
+          else:
+            header.add(_get_range(child))
+      else:
+        header.add(_get_range(node))
+
+    # 원래 순서대로 예산을 넘지 않는 만큼 함수를 묶기.
+    units = sorted((unit for unit in units if not targets or unit[0][0] in targets), key=lambda unit: unit[1])
+    limit = budget - sum(self._count_tokens(path, unit) for unit in header)
+    chunks, used = [], 0
+    for names, unit in units:
+      cost = self._count_tokens(path, unit)
+      if chunks and used + cost <= limit:
+        chunks[-1][0].extend(names)
+        chunks[-1][1].add(unit)
+        used += cost
+      else:
+        chunks.append((list(names), {unit}))
+        used = cost
+
+    logger.debug(f"code chunked: {len(units)} functions into {len(chunks)} chunks of {path}")
+    return [(names, self._to_code(path, header | ranges)) for names, ranges in chunks]
+
+
+  # 경로 path의 이름 name에 해당하는 줄 범위 리스트와 참조하는 (경로, 이름) 리스트 쌍을 반환합니다.
+  def _get_unit(self, path: Path, name: str) -> tuple[list, list]:
+    index = self.indexes[path]
+    attrs = name.split(".")
+
+    # import 구문.
+    if len(attrs) == 1 and name in index.imports:
+      node = index.imports[name]
+      return [_get_range(node)], self._find_definitions(name, exclude=path)
+
+    node = index.definitions.get(attrs[0])
+    if node is None: return [], []
+
+    # 전역 함수, 전역 변수, 참조한 클래스.
+    if len(attrs) == 1:
+      if isinstance(node, ClassDef):
+        return self._get_class_unit(path, node)
+      return [_get_range(node)], self._get_references(path, node)
+
+    # 클래스 메소드, 클래스 변수.
+    member = index.classes.get(attrs[0], {}).get(attrs[-1])
+    if member is None: return [], []
+    return [_get_header_range(node), _get_range(member)], self._get_references(path, member, attrs[0])
+
+
+  # 참조한 클래스 node의 머리, 생성자, 메소드 정의 줄 범위 리스트와 참조 리스트 쌍을 반환합니다.
+  def _get_class_unit(self, path: Path, node: ClassDef) -> tuple[list, list]:
+    units, references = [_get_header_range(node)], []
+    for child in node.body:
+      if isinstance(child, (FunctionDef, AsyncFunctionDef)):
+        # 생성자는 전체, 나머지 메소드는 정의 줄만 포함.
+        if child.name == "__init__":
+          units.append(_get_range(child))
+          references.extend(self._get_references(path, child, node.name))
+        else:
+          units.append(_get_header_range(child))
+    for base in node.bases:
+      references.extend((path, n.id) for n in walk(base) if isinstance(n, Name))
+    return units, references
+
+
+  # 경로 path의 구문 node가 참조하는 (경로, 이름) 리스트를 반환합니다. 클래스 cls 안이면 self 속성도 찾습니다.
+  def _get_references(self, path: Path, node, cls="") -> list[tuple[Path, str]]:
+    index, references = self.indexes[path], []
+    for child in walk(node):
+      # self.name 형태의 같은 클래스 멤버 참조.
+      if (cls and isinstance(child, Attribute) and isinstance(child.value, Name)
+          and child.value.id in ("self", "cls", cls) and child.attr in index.classes.get(cls, {})):
+        references.append((path, f"{cls}.{child.attr}"))
+      # 전역 이름 참조.
+      elif isinstance(child, Name) and isinstance(child.ctx, Load):
+        if child.id in index.imports or child.id in index.definitions:
+          references.append((path, child.id))
+    if cls and "__init__" in index.classes.get(cls, {}):
+      references.append((path, f"{cls}.__init__"))
+    return references
+
+
+  # 경로 exclude를 제외한 코드에서 최상위 이름 name을 정의한 (경로, 이름) 리스트를 반환합니다.
+  def _find_definitions(self, name: str, exclude: Path) -> list[tuple[Path, str]]:
+    return [(path, name) for path, index in self.indexes.items()
+            if path != exclude and name in index.definitions]
+
+
+  # 경로 path의 줄 범위 unit의 토큰 수를 추정합니다.
+  def _count_tokens(self, path: Path, unit: tuple[int, int]) -> int:
+    start, end = unit
+    chars = sum(len(line) + 1 for line in self.indexes[path].lines[start-1:end])
+    return chars // Default.Chars_Per_Token.value + 1
+
+
+  # 경로 path의 줄 범위 집합 units를 원래 순서대로 이어 코드 문자열로 반환합니다.
+  def _to_code(self, path: Path, units: set) -> str:
+    lines, codes, last = self.indexes[path].lines, [], 0
+    linenos = sorted({i for start, end in units for i in range(start, end + 1)})
+    for lineno in linenos:
+      # 생략한 줄이 있으면 생략한 첫 코드 줄의 들여쓰기로 생략 표시.
+      if last and lineno > last + 1:
+        omitted = [line for line in lines[last:lineno-1] if line.strip()] or [lines[lineno-1]]
+        indent = omitted[0][:len(omitted[0]) - len(omitted[0].lstrip())]
+        codes.append(f"{indent}{Default.Omitted.value}")
+      codes.append(lines[lineno-1])
+      last = lineno
+    return "\n".join(codes)
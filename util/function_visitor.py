@@ -9,6 +9,7 @@ class FunctionVisitor(NodeVisitor):
   def __init__(self):
     self.stack = []
     self.names = []
+    self.nodes = {}
 
 
   # 클래스 정의 구문 노드 진입 시 클래스 이름을 스택에 추가합니다.
@@ -24,15 +25,24 @@ class FunctionVisitor(NodeVisitor):
       name = ".".join(self.stack + [node.name])
       self.names.append(name)
     else:
-      self.names.append(node.name)
+      name = node.name
+      self.names.append(name)
+    self.nodes[name] = node
 
 
   # 경로 path의 코드를 파싱하면서 구성합니다.
   def get_attribute_names(self, path):
     self.stack.clear()
     self.names.clear()
+    self.nodes.clear()
 
     raw_code = "".join(read_file(path))
     tree = parse(raw_code)
     self.visit(tree)
-    return self.names
\ No newline at end of file
+    return self.names
+
+
+  # 경로 path의 코드를 파싱하고 완성된 함수 이름, 함수 정의 구문 노드 쌍을 dict로 반환합니다.
+  def get_attribute_nodes(self, path) -> dict:
+    self.get_attribute_names(path)
+    return dict(self.nodes)
\ No newline at end of file
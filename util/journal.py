@@ -0,0 +1,102 @@
+from enum import Enum
+from json import JSONDecodeError, dumps, loads
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing_extensions import Any, Callable
+
+from util.filesys import make_directory
+from util.logger import Logger, LoggerName
+
+
+# 작업 기록 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 작업 상태 열거형 클래스.
+class Status(Enum):
+  Pending = "pending"
+  Done = "done"
+  Failed = "failed"
+
+
+# 작업마다 상태와 완료한 결과를 jsonl 파일에 한 줄씩 덧붙여 기록하는 작업 기록 클래스.
+# 같은 작업의 기록이 여러 줄이면 마지막 줄을 사용하므로, 다시 실행하면 완료한 작업은 건너뛰고
+# 실패했거나 끝나지 않은 작업만 다시 수행합니다.
+class Journal:
+
+  def __init__(self, path: Path):
+    self.path = Path(path)
+    self.entries = {}
+    self.lock = Lock()
+    self.stats = {"reused": 0, "done": 0, "failed": 0}
+    self._load()
+
+
+  # 기록 파일을 읽어 작업별 마지막 기록을 불러옵니다. 중단으로 잘린 줄은 무시합니다.
+  def _load(self):
+    if not self.path.is_file(): return
+    with open(self.path, "r", encoding="utf-8") as f:
+      for line in f:
+        try:
+          entry = loads(line)
+          self.entries[entry["task"]] = entry
+        except (JSONDecodeError, KeyError, TypeError):
+          continue
+
+    done = sum(entry["status"] == Status.Done.value for entry in self.entries.values())
+    logger.info(f"journal loaded: {done}/{len(self.entries)} tasks done in {self.path}")
+
+
+  # 작업 task의 기록 entry를 파일 끝에 덧붙입니다.
+  def _append(self, task: str, status: Status, **entry):
+    entry = {"task": task, "status": status.value, "time": round(time(), 3), **entry}
+    with self.lock:
+      self.entries[task] = entry
+      make_directory(self.path.parent)
+      with open(self.path, "a", encoding="utf-8") as f:
+        f.write(dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+
+
+  # 작업 task가 완료되었는지 반환합니다.
+  def is_done(self, task: str) -> bool:
+    entry = self.entries.get(task)
+    return bool(entry) and entry["status"] == Status.Done.value
+
+
+  # 작업 task가 완료되어 있으면 기록한 결과를 load로 복원해 반환하고,
+  # 아니면 fct를 실행한 뒤 결과를 dump로 변환해 기록하고 반환합니다.
+  # fct에서 발생한 예외는 실패로 기록한 뒤 다시 발생시킵니다.
+  def run(self, task: str, fct: Callable, dump=lambda out: out, load=lambda out: out) -> Any:
+    if self.is_done(task):
+      with self.lock:
+        self.stats["reused"] += 1
+      logger.info(f"journal task skipped: {task} already done")
+      return load(self.entries[task]["output"])
+
+    self._append(task, Status.Pending)
+    try:
+      output = fct()
+    except BaseException as e:
+      self._append(task, Status.Failed, message=str(e) or type(e).__name__)
+      with self.lock:
+        self.stats["failed"] += 1
+      raise
+
+    self._append(task, Status.Done, output=dump(output))
+    with self.lock:
+      self.stats["done"] += 1
+    return output
+
+
+  # 이번 실행에서 재사용, 완료, 실패한 작업 수를 dict로 반환합니다.
+  def get_stats(self) -> dict:
+    with self.lock:
+      return dict(self.stats)
+
+
+  # 작업 기록 통계를 한 줄로 요약합니다.
+  def to_summary(self) -> str:
+    stats = self.get_stats()
+    return f"journal: {stats['reused']} tasks reused, {stats['done']} done, {stats['failed']} failed"
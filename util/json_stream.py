@@ -0,0 +1,83 @@
+from json import loads, JSONDecodeError
+
+from util.logger import Logger, LoggerName
+
+
+# 스트림 파서 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 스트림으로 받는 json 문자열에서 최상위 객체의 key 배열 요소를 완성되는 즉시 반환하는 파서 클래스.
+# 예: key가 "codes"이면 {"codes": [{..}, {..}]}의 각 {..}를 닫는 괄호를 받는 시점에 반환합니다.
+class JsonArrayStreamParser:
+
+  def __init__(self, key: str):
+    self.key = key
+    self.depth = 0
+    self.in_string = False
+    self.escaped = False
+    self.string = ""
+    self.last_key = ""
+    self.in_array = False
+    self.buffer = ""
+
+
+  # 문자열 조각 chunk를 읽고 새로 완성된 배열 요소 리스트를 반환합니다.
+  def feed(self, chunk: str) -> list[dict]:
+    items = []
+    for c in chunk:
+      item = self._feed_char(c)
+      if item is not None:
+        items.append(item)
+    return items
+
+
+  # 문자 c를 읽고 배열 요소가 완성되면 그 요소를 반환합니다.
+  def _feed_char(self, c: str) -> dict:
+    # 배열 요소 안이면 내용 기록.
+    if self.buffer:
+      self.buffer += c
+
+    # 문자열 안의 문자 처리.
+    if self.in_string:
+      if self.escaped:
+        self.escaped = False
+      elif c == "\\":
+        self.escaped = True
+      elif c == '"':
+        self.in_string = False
+        if self.depth == 1: self.last_key = self.string
+      elif self.depth == 1:
+        self.string += c
+      return None
+
+    if c == '"':
+      self.in_string = True
+      self.string = ""
+    elif c in "{[":
+      self.depth += 1
+      # 최상위 객체의 key 배열 시작.
+      if c == "[" and self.depth == 2 and self.last_key == self.key:
+        self.in_array = True
+      # 배열 요소 시작.
+      elif c == "{" and self.depth == 3 and self.in_array:
+        self.buffer = c
+    elif c in "}]":
+      self.depth -= 1
+      # 배열 요소 완성.
+      if c == "}" and self.depth == 2 and self.buffer:
+        return self._flush()
+      # 배열 종료.
+      if c == "]" and self.depth == 1:
+        self.in_array = False
+    return None
+
+
+  # 기록한 배열 요소를 dict로 변환하여 반환합니다.
+  def _flush(self) -> dict:
+    raw_item, self.buffer = self.buffer, ""
+    try:
+      return loads(raw_item)
+    except JSONDecodeError:
+      logger.warning(f"streamed item ignored: not json format")
+      return None
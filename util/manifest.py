@@ -0,0 +1,71 @@
+from ast import Constant, Expr, dump
+from copy import copy
+from hashlib import sha256
+from json import dumps
+from pathlib import Path
+
+from util.filesys import read_json, write_json
+from util.function_visitor import FunctionVisitor
+from util.logger import Logger, LoggerName
+
+
+# 생성 기록 목록 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 함수 정의 구문 node의 정규화한 AST 해시를 반환합니다.
+# 줄 번호, 주석, 서식, 문서 문자열은 해시에 포함하지 않습니다.
+def _hash_node(node) -> str:
+  node = copy(node)
+  body = node.body
+  if body and isinstance(body[0], Expr) and isinstance(body[0].value, Constant) and isinstance(body[0].value.value, str):
+    node.body = body[1:]
+  return sha256(dump(node, include_attributes=False).encode()).hexdigest()
+
+
+# 경로 path 코드의 함수 이름, 정규화한 AST 해시 쌍을 dict로 반환합니다.
+def hash_functions(path: Path) -> dict:
+  nodes = FunctionVisitor().get_attribute_nodes(path)
+  return {name: _hash_node(node) for name, node in nodes.items()}
+
+
+# 생성 결과에 영향을 주는 설정 configs의 해시를 반환합니다.
+def hash_configs(**configs) -> str:
+  return sha256(dumps(configs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# 함수마다 AST 해시, 설정 해시와 마지막 생성 결과를 기록하는 생성 기록 목록 클래스.
+# 두 해시가 모두 같은 함수는 다시 생성하지 않고 이전 결과를 이어서 사용합니다.
+class Manifest:
+
+  def __init__(self, path: Path):
+    self.path = Path(path)
+    self.functions = read_json(self.path).get("functions", {}) if self.path.is_file() else {}
+
+
+  # 함수 이름, AST 해시 dict hashes와 설정 해시 config에 대하여 다시 생성해야 하는 함수 이름 리스트를 반환합니다.
+  def get_changed(self, hashes: dict, config: str) -> list[str]:
+    return [name for name, digest in hashes.items()
+            if self.functions.get(name, {}).get("hash") != digest
+            or self.functions.get(name, {}).get("config") != config]
+
+
+  # 함수 name의 마지막 생성 결과를 반환합니다. 오류 줄이 없어 생성하지 않았으면 None을 반환합니다.
+  def get_result(self, name: str) -> dict:
+    return self.functions.get(name, {}).get("result")
+
+
+  # 함수 name의 AST 해시 digest, 설정 해시 config, 생성 결과 result를 기록합니다.
+  def update(self, name: str, digest: str, config: str, result=None):
+    self.functions[name] = {"hash": digest, "config": config, "result": result}
+
+
+  # 코드에 더 이상 없는 함수를 함수 이름 리스트 names만 남기고 제거합니다.
+  def retain(self, names: list[str]):
+    self.functions = {name: entry for name, entry in self.functions.items() if name in names}
+
+
+  # 생성 기록 목록을 파일에 저장합니다.
+  def save(self):
+    write_json(self.path, {"functions": self.functions})
+    logger.debug(f"manifest saved: {len(self.functions)} functions in {self.path}")
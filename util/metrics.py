@@ -0,0 +1,148 @@
+from collections import defaultdict
+from enum import Enum
+from threading import Lock
+
+from util.logger import Logger, LoggerName
+
+
+# 측정 기록기 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# LLM 모델 별 백만 토큰 당 가격(USD) 열거형 클래스. (모델, 입력, 캐시 입력, 출력)
+# 가격 목록: https://platform.openai.com/docs/pricing
+class Price(Enum):
+  GPT_4o = ("gpt-4o", 2.50, 1.25, 10.00)
+
+
+# LLM 호출 1회의 측정 기록 클래스.
+class CallRecord:
+
+  def __init__(self, tool="", fct="", iteration=0, model="", input_tokens=0, output_tokens=0,
+               cached_tokens=0, queue=0.0, wait=0.0, latency=0.0, success=True, cached=False,
+               retries=0, hedged=False, wasted=False, overlap=0.0):
+    self.tool = tool
+    self.function = fct
+    self.iteration = iteration
+    self.model = model
+    self.input_tokens = input_tokens
+    self.output_tokens = output_tokens
+    self.cached_tokens = cached_tokens
+    self.queue = queue
+    self.wait = wait
+    self.latency = latency
+    self.success = success
+    self.cached = cached
+    self.retries = retries
+    self.hedged = hedged
+    self.wasted = wasted
+    self.overlap = overlap
+
+
+  # 기록한 토큰 수의 가격(USD)을 반환합니다. 캐시로 응답한 호출은 가격이 없습니다.
+  def get_cost(self) -> float:
+    if self.cached: return 0.0
+    for price in Price:
+      model, input_price, cached_price, output_price = price.value
+      if not self.model.startswith(model): continue
+      uncached = max(0, self.input_tokens - self.cached_tokens)
+      return (uncached * input_price + self.cached_tokens * cached_price + self.output_tokens * output_price) / 1e6
+    return 0.0
+
+
+# 모든 LLM 요청 도구의 호출 측정 기록을 모으는 클래스.
+class Metrics:
+
+  _records = []
+  _lock = Lock()
+
+  # 호출 측정 기록 record를 추가합니다.
+  @classmethod
+  def record(cls, record: CallRecord):
+    with cls._lock:
+      cls._records.append(record)
+    logger.debug(f"LLM call: {record.tool} {record.function} #{record.iteration} "
+                 f"in {record.input_tokens} (cached {record.cached_tokens}), out {record.output_tokens} tokens, "
+                 f"{record.latency:.2f} sec")
+
+
+  # 태그 tags가 모두 일치하는 호출 측정 기록 리스트를 반환합니다.
+  @classmethod
+  def get_records(cls, **tags) -> list[CallRecord]:
+    with cls._lock:
+      records = list(cls._records)
+    return [r for r in records if all(getattr(r, key) == value for key, value in tags.items())]
+
+
+  # 모든 호출 측정 기록을 제거합니다.
+  @classmethod
+  def reset(cls):
+    with cls._lock:
+      cls._records.clear()
+
+
+  # 호출 측정 기록 리스트 records의 합계를 dict로 반환합니다.
+  # 버린 결과의 호출은 wasted_tokens, wasted_cost로 따로 합산합니다.
+  @staticmethod
+  def aggregate(records: list[CallRecord]) -> dict:
+    return {
+      "calls": len(records),
+      "failed": sum(not r.success for r in records),
+      "cached": sum(r.cached for r in records),
+      "retries": sum(r.retries for r in records),
+      "hedges": sum(r.hedged for r in records),
+      "input_tokens": sum(r.input_tokens for r in records),
+      "output_tokens": sum(r.output_tokens for r in records),
+      "cached_tokens": sum(r.cached_tokens for r in records),
+      "queue": round(sum(r.queue for r in records), 3),
+      "wait": round(sum(r.wait for r in records), 3),
+      "latency": round(sum(r.latency for r in records), 3),
+      "overlap": round(sum(r.overlap for r in records), 3),
+      "cost": round(sum(r.get_cost() for r in records), 6),
+      "wasted_tokens": sum(r.input_tokens + r.output_tokens for r in records if r.wasted),
+      "wasted_cost": round(sum(r.get_cost() for r in records if r.wasted), 6)
+    }
+
+
+  # 호출 측정 기록을 전체, 도구 별, 함수 별로 합산한 실행 요약을 dict로 반환합니다.
+  @classmethod
+  def summarize(cls, **tags) -> dict:
+    records = cls.get_records(**tags)
+    by_tool, by_function = defaultdict(list), defaultdict(list)
+    for r in records:
+      by_tool[r.tool].append(r)
+      by_function[r.function].append(r)
+
+    return {
+      "total": cls.aggregate(records),
+      "tools": {tool: cls.aggregate(rs) for tool, rs in by_tool.items()},
+      "functions": {fct: cls.aggregate(rs) for fct, rs in by_function.items()}
+    }
+
+
+  # 도구 별 호출 측정 기록 합계를 Prometheus 텍스트 형식 문자열로 반환합니다.
+  @classmethod
+  def to_prometheus(cls, **tags) -> str:
+    tools = cls.summarize(**tags)["tools"]
+    lines = []
+    for key, kind, help in [("calls", "counter", "LLM calls"),
+                            ("failed", "counter", "LLM calls without output"),
+                            ("cached", "counter", "LLM calls served from cache"),
+                            ("retries", "counter", "LLM request retries"),
+                            ("hedges", "counter", "LLM calls with a hedged request"),
+                            ("input_tokens", "counter", "LLM input tokens"),
+                            ("output_tokens", "counter", "LLM output tokens"),
+                            ("cached_tokens", "counter", "LLM cached input tokens"),
+                            ("queue", "counter", "LLM call queueing seconds"),
+                            ("wait", "counter", "LLM response waiting seconds"),
+                            ("latency", "counter", "LLM call end-to-end seconds"),
+                            ("overlap", "counter", "LLM call seconds overlapped with validation"),
+                            ("cost", "counter", "LLM call cost in USD"),
+                            ("wasted_tokens", "counter", "LLM tokens of discarded speculative calls"),
+                            ("wasted_cost", "counter", "LLM cost in USD of discarded speculative calls")]:
+      name = f"llm_{key}_total"
+      lines.append(f"# HELP {name} {help}")
+      lines.append(f"# TYPE {name} {kind}")
+      for tool, values in tools.items():
+        lines.append(f'{name}{{tool="{tool}"}} {values[key]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,118 @@
+from ast import (Assign, AsyncFor, Attribute, AugAssign, BinOp, Call, Compare, For, Gt, GtE, List, Lt, LtE, Name, Not,
+                 Store, Subscript, Tuple, UnaryOp, comprehension, walk)
+from enum import Enum
+from pathlib import Path
+
+from util.filesys import read_file
+from util.function_visitor import FunctionVisitor
+
+
+# TypeError 발생 가능 구문 종류, 기본 점수 열거형 클래스.
+class Risk(Enum):
+  Operation = ("operation", 2)
+  Comparison = ("comparison", 1)
+  Call = ("call", 1)
+  Subscript = ("subscript", 1)
+  Iteration = ("iteration", 1)
+  Unpacking = ("unpacking", 1)
+  Attribute = ("attribute", 1)
+
+
+# 정적 선별기 초기 값 열거형 클래스.
+class Default(Enum):
+  Untyped_Bonus = 2
+  Safe_Calls = ("print", "isinstance", "issubclass", "hasattr", "repr", "str", "type", "id", "super", "callable")
+
+
+# 함수 안의 TypeError 발생 후보 줄 클래스.
+class Candidate:
+
+  def __init__(self, lineno: int, code: str, kinds: list[str], score: int):
+    self.lineno = lineno
+    self.code = code
+    self.kinds = kinds
+    self.score = score
+
+
+  # 후보 줄을 요약한 정보를 출력합니다.
+  def to_summary(self) -> str:
+    return f"line {self.lineno}: `{self.code}` ({', '.join(self.kinds)})"
+
+
+# 구문 node가 상수, 상수 컨테이너로만 이루어졌는지 반환합니다.
+def _is_literal(node) -> bool:
+  return all(not isinstance(child, (Name, Attribute, Call, Subscript)) for child in walk(node))
+
+
+# 구문 node가 매개변수 params, self 속성, 호출 결과처럼 타입을 알 수 없는 값을 사용하는지 반환합니다.
+def _is_untyped(node, params: set) -> bool:
+  for child in walk(node):
+    if isinstance(child, Name) and child.id in params: return True
+    if isinstance(child, Attribute) and isinstance(child.value, Name) and child.value.id in ("self", "cls"): return True
+    if isinstance(child, Call): return True
+  return False
+
+
+# 함수 정의 구문 node의 매개변수 이름 집합을 반환합니다. self, cls는 제외합니다.
+def _get_params(node) -> set:
+  args = node.args
+  names = [arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs]
+  names += [arg.arg for arg in (args.vararg, args.kwarg) if arg]
+  return {name for name in names if name not in ("self", "cls")}
+
+
+# 함수 정의 구문 node 안의 구문마다 (줄 번호, 위험 종류, 점수) 리스트를 반환합니다.
+def _find_risks(node) -> list[tuple[int, Risk, int]]:
+  params, risks = _get_params(node), []
+  bonus = lambda *operands: Default.Untyped_Bonus.value if any(_is_untyped(op, params) for op in operands) else 0
+
+  for child in walk(node):
+    # 상수끼리가 아닌 연산, 크기 비교. not은 모든 객체에 사용할 수 있으므로 제외.
+    if isinstance(child, (BinOp, AugAssign)):
+      left, right = (child.left, child.right) if isinstance(child, BinOp) else (child.target, child.value)
+      if not (_is_literal(left) and _is_literal(right)):
+        risks.append((child.lineno, Risk.Operation, Risk.Operation.value[1] + bonus(left, right)))
+    elif isinstance(child, UnaryOp) and not isinstance(child.op, Not) and not _is_literal(child.operand):
+      risks.append((child.lineno, Risk.Operation, Risk.Operation.value[1] + bonus(child.operand)))
+    elif isinstance(child, Compare) and any(isinstance(op, (Gt, GtE, Lt, LtE)) for op in child.ops):
+      operands = [child.left] + child.comparators
+      if not all(_is_literal(op) for op in operands):
+        risks.append((child.lineno, Risk.Comparison, Risk.Comparison.value[1] + bonus(*operands)))
+    # 안전한 내장 함수를 제외한 호출.
+    elif isinstance(child, Call):
+      if isinstance(child.func, Name) and child.func.id in Default.Safe_Calls.value: continue
+      operands = [child.func] + child.args + [keyword.value for keyword in child.keywords]
+      risks.append((child.lineno, Risk.Call, Risk.Call.value[1] + bonus(*operands)))
+    # 값을 읽는 인덱싱.
+    elif isinstance(child, Subscript) and not isinstance(child.ctx, Store) and not _is_literal(child.value):
+      risks.append((child.lineno, Risk.Subscript, Risk.Subscript.value[1] + bonus(child.value, child.slice)))
+    # 상수가 아닌 값의 반복, 풀어서 대입.
+    elif isinstance(child, (For, AsyncFor, comprehension)) and not _is_literal(child.iter):
+      lineno = child.iter.lineno
+      risks.append((lineno, Risk.Iteration, Risk.Iteration.value[1] + bonus(child.iter)))
+    elif (isinstance(child, Assign) and any(isinstance(target, (Tuple, List)) for target in child.targets)
+          and not _is_literal(child.value)):
+      risks.append((child.lineno, Risk.Unpacking, Risk.Unpacking.value[1] + bonus(child.value)))
+    # 매개변수의 속성 접근.
+    elif isinstance(child, Attribute) and isinstance(child.value, Name) and child.value.id in params:
+      risks.append((child.lineno, Risk.Attribute, Risk.Attribute.value[1]))
+  return risks
+
+
+# 경로 path 코드의 함수마다 TypeError 발생 후보 줄 리스트를 점수가 높은 순서로 dict로 반환합니다.
+# 후보가 없는 함수는 빈 리스트를 가집니다.
+def screen(path: Path) -> dict:
+  lines = "".join(read_file(path) or []).split("\n")
+  candidates = {}
+  for name, node in FunctionVisitor().get_attribute_nodes(path).items():
+    # 줄마다 위험 종류를 모으고 가장 높은 점수와 종류 수로 점수 계산.
+    by_line = {}
+    for lineno, risk, score in _find_risks(node):
+      kinds, best = by_line.get(lineno, ([], 0))
+      if risk.value[0] not in kinds: kinds.append(risk.value[0])
+      by_line[lineno] = (kinds, max(best, score))
+
+    ranked = [Candidate(lineno, lines[lineno - 1].strip(), kinds, best + len(kinds) - 1)
+              for lineno, (kinds, best) in by_line.items()]
+    candidates[name] = sorted(ranked, key=lambda cand: (-cand.score, cand.lineno))
+  return candidates
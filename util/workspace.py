@@ -0,0 +1,76 @@
+from enum import Enum
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from util.logger import Logger, LoggerName
+
+
+# 검증 작업 공간 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 검증 작업 공간 보존 정책 열거형 클래스.
+class Retain(Enum):
+  Never = "never"
+  Failed = "failed"
+  Always = "always"
+
+
+# 검증 작업 공간 초기 값 열거형 클래스.
+class Default(Enum):
+  Root = None
+  Retain = Retain.Never.value
+  Prefix = "validation_"
+
+
+# 검증마다 만드는 고유한 임시 작업 공간 클래스.
+# 동시에 실행하는 검증이나 같은 폴더에서 실행한 여러 프로세스가 서로의 테스트, 결과 파일을 덮어쓰지 않도록
+# 모든 검증 파일은 작업 공간 안에 기록하며, 검증이 끝나면 보존 정책에 따라 작업 공간을 삭제합니다.
+class Workspace:
+
+  _root = Default.Root.value
+  _retain = Retain(Default.Retain.value)
+
+  def __init__(self, prefix=Default.Prefix.value):
+    self.path = Path(mkdtemp(prefix=prefix, dir=Workspace._root))
+    self.failed = False
+
+
+  # 모든 작업 공간을 만들 상위 경로 root와 보존 정책 이름 retain을 설정합니다. root가 없으면 시스템 임시 폴더를 사용합니다.
+  # 상위 경로는 검증 스레드들이 동시에 만들지 않도록 설정할 때 한 번 만듭니다.
+  @classmethod
+  def configure(cls, root=Default.Root.value, retain=Default.Retain.value):
+    if root: Path(root).mkdir(parents=True, exist_ok=True)
+    cls._root = str(root) if root else None
+    cls._retain = Retain(retain)
+
+
+  # 작업 공간 안의 파일 경로를 반환합니다.
+  def __truediv__(self, name: str) -> Path:
+    return self.path/name
+
+
+  def __enter__(self):
+    return self
+
+
+  # 작업 공간을 나가며 검증 실패를 기록하고 정리합니다. 예외는 그대로 전달합니다.
+  def __exit__(self, exc_type, exc, tb):
+    if exc_type: self.failed = True
+    self.cleanup()
+    return False
+
+
+  # 작업 공간을 실패한 검증으로 표시합니다.
+  def fail(self):
+    self.failed = True
+
+
+  # 보존 정책에 따라 작업 공간을 삭제하거나 남깁니다.
+  def cleanup(self):
+    retain = Workspace._retain
+    if retain == Retain.Always or (retain == Retain.Failed and self.failed):
+      logger.debug(f"workspace retained: {self.path}")
+      return
+    rmtree(self.path, ignore_errors=True)
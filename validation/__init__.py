@@ -2,7 +2,11 @@ from enum import Enum
 
 # 레지스트리 모듈 등록
 from validation.pytest import Pytest
+from validation.inprocess import InprocessPytest
+from validation.fork import ForkPytest
 
 # 레지스트리 이름 등록
 class Available_Valiator(Enum):
-  Pytest = "pytest"
\ No newline at end of file
+  Pytest = "pytest"
+  Pytest_Inprocess = "pytest-inprocess"
+  Pytest_Fork = "pytest-fork"
\ No newline at end of file
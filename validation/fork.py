@@ -0,0 +1,366 @@
+from argparse import ArgumentParser
+from ast import AsyncFunctionDef, ClassDef, FunctionDef, parse
+from collections import deque
+from concurrent.futures import Future
+from enum import Enum
+from importlib import import_module
+from itertools import count
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+from os import (O_WRONLY, close, cpu_count, devnull, dup2, fdopen, fork, kill, open as open_fd, pipe, read, sysconf,
+                waitpid, _exit)
+from pathlib import Path
+from pickle import dumps, loads
+from signal import SIGKILL
+from threading import Lock, Thread
+from time import monotonic
+from typing_extensions import override
+
+import pytest
+from pytest_jsonreport.plugin import JSONReport
+
+from common.error import Error
+from util.filesys import read_file
+from validation.framework import TestFramework, TestFrameworkFactory
+from validation.timeout import AdaptiveTimeout
+from util.logger import Logger, LoggerName
+
+
+# 포크 Pytest 실행기 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 포크 Pytest 실행기 초기 값 열거형 클래스.
+class Default(Enum):
+  Execution_Timeout = 20
+  Run_Timeout = 60
+  Memory_Limit = 1024
+  Workers = cpu_count() or 1
+  Kill_Margin = 1.0
+  Start_Method = "spawn"
+  Poll_Interval = 0.05
+  Read_Size = 65536
+  Args = ("--tb=long", "-s", "-p", "no:cacheprovider", "--json-report-file=none")
+
+
+# 오류 메시지 message의 pytest 실행 실패 보고서를 반환합니다.
+def _failed_report(message: str) -> dict:
+  return {"exitcode": 3, "collectors": [{"longrepr": message}]}
+
+
+# 프로세스 pid의 상주 메모리 크기를 MB 단위로 반환합니다. 알 수 없으면 0을 반환합니다.
+def _get_rss(pid: int) -> float:
+  try:
+    with open(f"/proc/{pid}/statm", "r") as f:
+      pages = int(f.read().split()[1])
+    return pages * sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+  except (OSError, ValueError, IndexError):
+    return 0
+
+
+# 코드 경로 paths의 모듈을 불러옵니다. 작업 폴더 밖이거나 불러올 수 없는 모듈은 건너뜁니다.
+def _preload(paths: list[str]):
+  for path in paths:
+    try:
+      parts = list(Path(path).resolve().relative_to(Path.cwd().resolve()).with_suffix("").parts)
+      if parts and parts[-1] == "__init__": parts.pop()
+      import_module(".".join(parts))
+    except BaseException:
+      continue
+
+
+# 포크한 자식 프로세스에서 경로 path의 테스트를 pytest 인자 args로 실행하고 보고서를 파일 기술자 fd로 보낸 뒤 종료합니다.
+def _run_child(fd: int, path: str, args: list[str]):
+  try:
+    plugin = JSONReport()
+    pytest.main([path, *args], plugins=[plugin])
+    data = dumps(plugin.report or _failed_report("RuntimeError: no pytest report"))
+  except BaseException as e:
+    data = dumps(_failed_report(f"{type(e).__name__}: {e}"))
+  try:
+    with fdopen(fd, "wb") as f:
+      f.write(data)
+  finally:
+    _exit(0)
+
+
+# 경로 path의 테스트 파일에서 pytest 테스트 함수 이름을 정의한 순서대로 반환합니다. 클래스 메소드는 "클래스::메소드"입니다.
+def _get_test_names(path: Path) -> list[str]:
+  try:
+    tree = parse("".join(read_file(path) or []))
+  except SyntaxError:
+    return []
+
+  names = []
+  for node in tree.body:
+    if isinstance(node, (FunctionDef, AsyncFunctionDef)) and node.name.startswith("test"):
+      names.append(node.name)
+    elif isinstance(node, ClassDef) and node.name.startswith("Test"):
+      names.extend(f"{node.name}::{child.name}" for child in node.body
+                   if isinstance(child, (FunctionDef, AsyncFunctionDef)) and child.name.startswith("test"))
+  return names
+
+
+# pytest 보고서 report의 테스트마다 (제한 시간 안에 끝났는지, setup, call, teardown 실행 시간 합) 리스트를 반환합니다.
+# 제한 시간을 넘어 종료된 자식의 보고서는 끝나지 않은 테스트 하나로 반환합니다.
+def _get_durations(report: dict) -> list[tuple[bool, float]]:
+  if not report.get("tests"):
+    longrepr = str(report.get("collectors", [{}])[-1].get("longrepr", ""))
+    return [(False, 0.0)] if longrepr.startswith("TimeoutError") else []
+
+  durations = []
+  for test in report.get("tests", []):
+    message = test.get("call", {}).get("crash", {}).get("message", "")
+    duration = sum(test.get(phase, {}).get("duration", 0) for phase in ("setup", "call", "teardown"))
+    durations.append(("Timeout" not in message, duration))
+  return durations
+
+
+# pytest와 대상 모듈을 미리 불러온 원본 프로세스에서 연결 conn으로 요청을 받아 처리합니다.
+# 실행 요청마다 자식 프로세스를 포크하되 동시에 workers개까지 실행하고, 나머지는 차례를 기다립니다.
+# 제한 시간은 포크한 시점부터 자식마다 따로 재며, 제한 시간이나 메모리 제한을 넘은 자식은 종료한 뒤 결과를 요청 번호와 함께 보냅니다.
+def _serve(conn, workers: int):
+  fd = open_fd(devnull, O_WRONLY)
+  dup2(fd, 1)
+  dup2(fd, 2)
+
+  # 플러그인을 미리 불러오도록 빈 수집을 한 번 실행.
+  pytest.main(["--collect-only", "-q", "-p", "no:cacheprovider", devnull])
+
+  running, pending = {}, deque()
+  while True:
+    # 차례를 기다리는 요청 포크.
+    while pending and len(running) < workers:
+      id, path, args, timeout, memory = pending.popleft()
+      reader, writer = pipe()
+      pid = fork()
+      if pid == 0:
+        close(reader)
+        _run_child(writer, path, args)
+      close(writer)
+      running[reader] = {"id": id, "pid": pid, "chunks": [], "timeout": timeout,
+                         "deadline": monotonic() + timeout, "memory": memory}
+
+    ready = wait([conn, *running], Default.Poll_Interval.value if running else None)
+    for source in ready:
+      # 요청 처리.
+      if source is conn:
+        try:
+          request = conn.recv()
+        except EOFError:
+          request = None
+        if request is None:
+          for task in running.values():
+            kill(task["pid"], SIGKILL)
+          return
+        if request[0] == "preload":
+          _preload(request[1])
+          continue
+
+        pending.append(request[1:])
+
+      # 자식 결과 수신. 끝까지 읽으면 결과 전송.
+      else:
+        task = running[source]
+        data = read(source, Default.Read_Size.value)
+        if data:
+          task["chunks"].append(data)
+          continue
+        del running[source]
+        close(source)
+        waitpid(task["pid"], 0)
+        try:
+          report = loads(b"".join(task["chunks"]))
+        except Exception:
+          report = _failed_report("RuntimeError: pytest process terminated without report")
+        conn.send((task["id"], report))
+
+    # 제한을 넘은 자식 종료.
+    now = monotonic()
+    for source, task in list(running.items()):
+      if now > task["deadline"]:
+        message = f"TimeoutError: test run exceeded {task['timeout']} seconds"
+      elif task["memory"] and _get_rss(task["pid"]) > task["memory"]:
+        message = f"MemoryError: test run exceeded {task['memory']} MB"
+      else:
+        continue
+      kill(task["pid"], SIGKILL)
+      waitpid(task["pid"], 0)
+      del running[source]
+      close(source)
+      conn.send((task["id"], _failed_report(message)))
+
+
+# pytest와 대상 모듈을 미리 불러온 원본 프로세스 클래스.
+# 여러 스레드의 요청을 요청 번호로 구분하고, 응답은 수신 스레드가 요청마다 전달합니다.
+class _Zygote:
+
+  def __init__(self, method: str, workers: int):
+    context = get_context(method)
+    self.conn, child = context.Pipe()
+    self.process = context.Process(target=_serve, args=(child, workers), daemon=True, name="pytest-zygote")
+    self.process.start()
+    child.close()
+
+    self.lock = Lock()
+    self.ids = count()
+    self.waiting = {}
+    self.preloaded = set()
+    self.receiver = Thread(target=self._receive, daemon=True, name="pytest-zygote-receiver")
+    self.receiver.start()
+
+
+  # 원본 프로세스의 응답을 요청마다 전달합니다. 연결이 끊기면 남은 요청을 모두 실패로 처리합니다.
+  def _receive(self):
+    while True:
+      try:
+        id, report = self.conn.recv()
+      except (EOFError, OSError):
+        break
+      with self.lock:
+        future = self.waiting.pop(id, None)
+      if future: future.set_result(report)
+
+    with self.lock:
+      waiting, self.waiting = self.waiting, {}
+    for future in waiting.values():
+      future.set_exception(EOFError("pytest zygote terminated"))
+
+
+  # 아직 불러오지 않은 코드 경로 paths의 모듈을 원본 프로세스에서 불러옵니다. 이후 포크하는 자식은 모두 공유합니다.
+  def preload(self, paths: list[Path]):
+    with self.lock:
+      paths = [str(path) for path in paths if str(path) not in self.preloaded]
+      if not paths: return
+      self.preloaded.update(paths)
+      self.conn.send(("preload", paths))
+
+
+  # 경로 path의 테스트를 pytest 인자 args로 포크 후 timeout초, memory MB 제한 안에서 실행하도록 요청하고 보고서 Future를 반환합니다.
+  # 원본 프로세스가 종료되면 Future는 EOFError로 끝납니다.
+  def submit(self, path: str, args: list[str], timeout: float, memory: float) -> Future:
+    future = Future()
+    with self.lock:
+      id = next(self.ids)
+      self.waiting[id] = future
+      self.conn.send(("run", id, str(path), args, timeout, memory))
+    return future
+
+
+  # 원본 프로세스를 종료합니다.
+  def close(self):
+    try:
+      self.conn.send(None)
+    except (OSError, ValueError):
+      pass
+    self.process.join(1)
+    if self.process.is_alive(): self.process.kill()
+    self.conn.close()
+
+
+# pytest와 대상 모듈을 미리 불러온 원본 프로세스에서 테스트 파일마다 자식 프로세스를 포크해 실행하는 실행기 클래스.
+# 자식은 원본의 메모리를 쓰기 시 복사로 공유하므로 불러오기 비용 없이 시작하고, 실행이 끝나면 상태와 함께 사라집니다.
+# 도구 설정에 "parallel"이 있으면 테스트 함수마다 따로 포크해 병렬로 실행하고, "adaptive_timeout"이 있으면
+# 관측한 실행 시간으로 테스트마다의 제한 시간을 정합니다.
+# 원본 프로세스는 모든 실행기가 공유합니다. fork를 지원하는 운영체제에서만 사용할 수 있습니다.
+@TestFrameworkFactory.register("pytest-fork")
+class ForkPytest(TestFramework):
+
+  _zygote = None
+  _lock = Lock()
+
+  @override
+  def __init__(self, config={}, preload=[], **configs):
+    self.timeout = config.get("timeout", Default.Execution_Timeout.value)
+    self.run_timeout = config.get("run_timeout", Default.Run_Timeout.value)
+    self.memory_limit = config.get("memory_limit", Default.Memory_Limit.value)
+    self.start_method = config.get("start_method", Default.Start_Method.value)
+    self.workers = config.get("workers", Default.Workers.value)
+    self.parallel = config.get("parallel", False)
+    self.adaptive = None
+    if "adaptive_timeout" in config:
+      self.adaptive = AdaptiveTimeout("pytest-fork", **{"maximum": self.timeout, **config["adaptive_timeout"]})
+    self.preload = list(preload)
+
+
+  # 경로 path의 테스트 프레임워크를 실행하고 오류 리스트를 반환합니다.
+  # 병렬 실행이면 테스트 함수마다 자식 프로세스를 따로 포크하고, 각 테스트는 끝나는 대로 결과를 받습니다.
+  # 원본 프로세스가 종료되면 원본 프로세스를 버리고 빈 리스트를 반환합니다.
+  @override
+  def _run_framework(self, path: Path, **configs) -> list[Error]:
+    names = _get_test_names(path) if self.parallel else []
+    targets = [f"{path}::{name}" for name in names] or [str(path)]
+
+    # 테스트마다의 제한 시간. 병렬 실행이면 자식 제한 시간도 테스트 하나 기준.
+    timeout = self.adaptive.get() if self.adaptive else self.timeout
+    run_timeout = timeout + Default.Kill_Margin.value if names else self.run_timeout
+    args = [*Default.Args.value, f"--execution-timeout={timeout}"]
+
+    zygote = self._get_zygote()
+    try:
+      zygote.preload(self.preload)
+      futures = [zygote.submit(target, args, run_timeout, self.memory_limit) for target in targets]
+      reports = [future.result() for future in futures]
+    except (EOFError, OSError) as e:
+      logger.warning(f"pytest zygote discarded: {e or type(e).__name__}")
+      self._discard(zygote)
+      return []
+
+    # 테스트의 실행 시간 기록. 제한 시간을 넘긴 테스트는 이번 제한 시간으로 기록.
+    if self.adaptive:
+      for finished, duration in (item for report in reports for item in _get_durations(report)):
+        if finished: self.adaptive.record(duration)
+        else: self.adaptive.record_timeout(timeout)
+
+    errors = [Error.from_pytest(report) for report in reports]
+    if not names: return errors[0]
+    return [errs[0] if errs else Error("RuntimeError", "no pytest result") for errs in errors]
+
+
+  # 공유 원본 프로세스를 반환합니다. 없거나 종료되었으면 새로 만듭니다.
+  def _get_zygote(self) -> _Zygote:
+    with self._lock:
+      zygote = ForkPytest._zygote
+      if zygote is None or not zygote.process.is_alive():
+        if zygote: zygote.close()
+        zygote = ForkPytest._zygote = _Zygote(self.start_method, self.workers)
+      return zygote
+
+
+  # 원본 프로세스 zygote가 아직 공유 중이면 종료합니다.
+  def _discard(self, zygote: _Zygote):
+    with self._lock:
+      if ForkPytest._zygote is not zygote: return
+      ForkPytest._zygote = None
+    zygote.close()
+
+
+  # 공유 원본 프로세스를 종료합니다.
+  @classmethod
+  def shutdown(cls):
+    with cls._lock:
+      zygote, cls._zygote = cls._zygote, None
+    if zygote: zygote.close()
+
+
+def main():
+  # 인자 파싱.
+  parser = ArgumentParser()
+  parser.add_argument("-s", "--src", metavar="SOURCE_PATH", type=Path, required=True, nargs='+',
+                      help="test code file paths")
+  parser.add_argument("-p", "--preload", metavar="PRELOAD_PATH", type=Path, default=[], nargs='+',
+                      help="source code file paths imported before the tests")
+  parser.add_argument("-pr", "--parallel", action="store_true",
+                      help="run each test function in its own process in parallel")
+  args = parser.parse_args()
+
+  # 같은 원본 프로세스로 테스트 수행.
+  runner = ForkPytest({"parallel": args.parallel}, preload=args.preload)
+  for src in args.src:
+    for err in runner.test(src):
+      print(err.to_string())
+  ForkPytest.shutdown()
+
+
+if __name__ == "__main__":
+  main()
@@ -14,8 +14,8 @@ class TestFramework():
 
 
   # 경로 path의 코드를 테스트하여 찾은 오류 리스트를 반환합니다.
-  def test(self, path=Path("test/test.py"), **configs) -> list[Error]:
-    make_directory(path)
+  def test(self, path: Path, **configs) -> list[Error]:
+    make_directory(Path(path).parent)
     return self._run_framework(path, **configs)
   
 
@@ -0,0 +1,166 @@
+from argparse import ArgumentParser
+from enum import Enum
+from multiprocessing import get_context
+from os import O_WRONLY, devnull, dup2, open as open_fd
+from pathlib import Path
+from threading import Lock
+from typing_extensions import override
+import sys
+
+import pytest
+from pytest_jsonreport.plugin import JSONReport
+
+from common.error import Error
+from validation.framework import TestFramework, TestFrameworkFactory
+from util.logger import Logger, LoggerName
+
+
+# 상주 Pytest 실행기 로그 출력 설정.
+logger = Logger.get_logger(LoggerName.Internal)
+
+
+# 상주 Pytest 실행기 초기 값 열거형 클래스.
+class Default(Enum):
+  Execution_Timeout = 20
+  Run_Timeout = 60
+  Start_Method = "spawn"
+  Args = ("--tb=long", "-s", "-p", "no:cacheprovider", "--json-report-file=none")
+
+
+# 모듈 module이 경로 리스트 roots 아래의 프로젝트 코드인지 반환합니다. 설치한 패키지는 제외합니다.
+def _is_local(module, roots: list[Path]) -> bool:
+  file = getattr(module, "__file__", None)
+  if not file: return False
+  path = Path(file).resolve()
+  return "site-packages" not in path.parts and any(path.is_relative_to(root) for root in roots)
+
+
+# 상주 프로세스에서 연결 conn으로 받은 (테스트 경로, pytest 인자) 요청마다 pytest를 실행하고 json 보고서를 보냅니다.
+# 실행마다 새로 불러온 프로젝트 모듈과 sys.path를 되돌려 테스트 간 모듈 상태를 격리합니다.
+def _serve(conn):
+  fd = open_fd(devnull, O_WRONLY)
+  dup2(fd, 1)
+  dup2(fd, 2)
+
+  while True:
+    try:
+      request = conn.recv()
+    except EOFError:
+      break
+    if request is None: break
+
+    path, args = request
+    modules, paths = set(sys.modules), list(sys.path)
+    roots = [Path.cwd().resolve(), Path(path).parent.resolve()]
+    plugin = JSONReport()
+    try:
+      pytest.main([path, *args], plugins=[plugin])
+      report = plugin.report or {"exitcode": 3, "collectors": [{"longrepr": "RuntimeError: no pytest report"}]}
+    except BaseException as e:
+      report = {"exitcode": 3, "collectors": [{"longrepr": f"{type(e).__name__}: {e}"}]}
+    finally:
+      for name in set(sys.modules) - modules:
+        if _is_local(sys.modules[name], roots): del sys.modules[name]
+      sys.path[:] = paths
+    conn.send(report)
+
+
+# pytest를 불러온 상주 프로세스 클래스.
+class _Worker:
+
+  def __init__(self, method: str):
+    context = get_context(method)
+    self.conn, child = context.Pipe()
+    self.process = context.Process(target=_serve, args=(child,), daemon=True, name="pytest-worker")
+    self.process.start()
+    child.close()
+
+
+  # 경로 path의 테스트를 pytest 인자 args로 실행하고, timeout초 안에 받은 json 보고서를 반환합니다.
+  def run(self, path: Path, args: list[str], timeout: float) -> dict:
+    self.conn.send((str(path), args))
+    if not self.conn.poll(timeout):
+      raise TimeoutError(f"pytest worker not responding in {timeout} seconds")
+    return self.conn.recv()
+
+
+  # 상주 프로세스를 종료합니다.
+  def close(self):
+    try:
+      self.conn.send(None)
+    except (OSError, ValueError):
+      pass
+    self.process.join(1)
+    if self.process.is_alive(): self.process.kill()
+    self.conn.close()
+
+
+# 상주 프로세스 안에서 pytest를 실행하는 실행기 클래스.
+# 실행할 때마다 인터프리터와 pytest 플러그인을 새로 불러오지 않고, 결과는 파일 대신 파이프로 받습니다.
+# 상주 프로세스는 모든 실행기가 공유하며, 동시에 실행하는 테스트 수만큼 만들어 재사용합니다.
+@TestFrameworkFactory.register("pytest-inprocess")
+class InprocessPytest(TestFramework):
+
+  _idle = []
+  _lock = Lock()
+
+  @override
+  def __init__(self, config={}, **configs):
+    self.timeout = config.get("timeout", Default.Execution_Timeout.value)
+    self.run_timeout = config.get("run_timeout", Default.Run_Timeout.value)
+    self.start_method = config.get("start_method", Default.Start_Method.value)
+
+
+  # 경로 path의 테스트 프레임워크를 실행하고 오류 리스트를 반환합니다.
+  # 상주 프로세스가 응답하지 않거나 종료되면 프로세스를 버리고 빈 리스트를 반환합니다.
+  @override
+  def _run_framework(self, path: Path, **configs) -> list[Error]:
+    worker = self._acquire()
+    try:
+      report = worker.run(path, [*Default.Args.value, f"--execution-timeout={self.timeout}"], self.run_timeout)
+    except (TimeoutError, EOFError, OSError) as e:
+      logger.warning(f"pytest worker discarded: {e or type(e).__name__}")
+      worker.close()
+      return []
+
+    with self._lock:
+      self._idle.append(worker)
+    return Error.from_pytest(report)
+
+
+  # 쉬고 있는 상주 프로세스를 반환합니다. 없으면 새로 만듭니다.
+  def _acquire(self) -> _Worker:
+    with self._lock:
+      while self._idle:
+        worker = self._idle.pop()
+        if worker.process.is_alive(): return worker
+        worker.close()
+    return _Worker(self.start_method)
+
+
+  # 쉬고 있는 모든 상주 프로세스를 종료합니다.
+  @classmethod
+  def shutdown(cls):
+    with cls._lock:
+      workers, cls._idle = cls._idle, []
+    for worker in workers:
+      worker.close()
+
+
+def main():
+  # 인자 파싱.
+  parser = ArgumentParser()
+  parser.add_argument("-s", "--src", metavar="SOURCE_PATH", type=Path, required=True, nargs='+',
+                      help="test code file paths")
+  args = parser.parse_args()
+
+  # 같은 상주 프로세스로 테스트 수행.
+  runner = InprocessPytest()
+  for src in args.src:
+    for err in runner.test(src):
+      print(err.to_string())
+  InprocessPytest.shutdown()
+
+
+if __name__ == "__main__":
+  main()
@@ -1,5 +1,4 @@
 from argparse import ArgumentParser
-from enum import Enum
 from subprocess import run, DEVNULL
 from pathlib import Path
 from typing_extensions import override
@@ -9,11 +8,6 @@ from validation.framework import TestFramework, TestFrameworkFactory
 from util.filesys import make_directory, read_json
 
 
-# Pytest 실행기 초기 값 열거형 클래스.
-class Default(Enum):
-  Result_Path = Path("test/pytest.json")
-
-
 # Pytest 프로세스 실행기 클래스.
 @TestFrameworkFactory.register("pytest")
 class Pytest(TestFramework):
@@ -22,11 +16,14 @@ class Pytest(TestFramework):
   def __init__(self, **config): pass
 
   # 경로 path의 테스트 프레임워크를 실행하고 오류 리스트를 반환합니다.
+  # 동시에 실행하는 테스트끼리 결과 파일이 겹치지 않도록 결과는 테스트 파일의 작업 공간에 테스트 파일 이름으로 기록합니다.
+  # 결과 폴더 out_path를 지정하면 그 폴더에 기록합니다.
   @override
-  def _run_framework(self, path: Path, out_path=Path("test")) -> list[Error]:
-    out_base_path = out_path/"pytest.json"
+  def _run_framework(self, path: Path, out_path=None) -> list[Error]:
+    out_path = Path(out_path) if out_path else Path(path).parent
+    out_base_path = out_path/f"{Path(path).stem}.json"
     make_directory(out_path)
-    run(args=['python', '-m', 'pytest', path, "--json-report", "--tb=long", "-s", "--execution-timeout=20", f"--json-report-file={out_base_path}"],
+    run(args=['python', '-m', 'pytest', path, "--json-report", "--tb=long", "-s", "-p", "no:cacheprovider", "--execution-timeout=20", f"--json-report-file={out_base_path}"],
         stdout=DEVNULL, stderr=DEVNULL)
     return Error.from_pytest(read_json(out_base_path))
 
@@ -37,8 +34,8 @@ def main():
   parser.add_argument("-s", "--src", metavar="SOURCE_PATH", type=Path, required=True,
                       help="source code file path")
   parser.add_argument("-o", "--out", metavar="OUTPUT_PATH", type=Path,
-                      default=Default.Result_Path.value,
-                      help="output path")
+                      default=None,
+                      help="result directory path (default: next to the test file)")
   args = parser.parse_args()
 
   # 파싱한 인자 연결.
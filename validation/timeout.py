@@ -0,0 +1,53 @@
+from collections import deque
+from enum import Enum
+from threading import Lock
+
+
+# 적응형 제한 시간 초기 값 열거형 클래스.
+class Default(Enum):
+  Quantile = 0.95
+  Factor = 3.0
+  Minimum = 1.0
+  Maximum = 20.0
+  Min_Samples = 10
+  Window = 200
+
+
+# 관측한 테스트 실행 시간 분위수(p95)의 factor배를 minimum, maximum 사이로 제한해 테스트마다의 제한 시간으로 사용하는 클래스.
+# 실행 시간은 같은 이름 name끼리 공유하며, min_samples개를 관측하기 전에는 maximum을 사용합니다.
+# 제한 시간을 넘긴 테스트는 그 제한 시간을 실행 시간으로 기록하므로, 제한 시간을 넘기는 테스트가 늘면 제한 시간도 다시 늘어납니다.
+class AdaptiveTimeout:
+
+  _durations = {}
+  _lock = Lock()
+
+  def __init__(self, name="", quantile=Default.Quantile.value, factor=Default.Factor.value,
+               minimum=Default.Minimum.value, maximum=Default.Maximum.value, min_samples=Default.Min_Samples.value):
+    self.name = name
+    self.quantile = quantile
+    self.factor = factor
+    self.minimum = minimum
+    self.maximum = maximum
+    self.min_samples = min_samples
+    with self._lock:
+      self.durations = self._durations.setdefault(name, deque(maxlen=Default.Window.value))
+
+
+  # 다음 테스트의 제한 시간을 반환합니다.
+  def get(self) -> float:
+    with self._lock:
+      durations = sorted(self.durations)
+    if len(durations) < self.min_samples: return self.maximum
+    observed = durations[min(len(durations) - 1, int(len(durations) * self.quantile))]
+    return round(min(self.maximum, max(self.minimum, observed * self.factor)), 3)
+
+
+  # 제한 시간 안에 끝난 테스트의 실행 시간 duration을 기록합니다.
+  def record(self, duration: float):
+    with self._lock:
+      self.durations.append(duration)
+
+
+  # 제한 시간 timeout 안에 끝나지 않은 테스트를 기록합니다. 실제 실행 시간은 알 수 없으므로 timeout을 하한으로 기록합니다.
+  def record_timeout(self, timeout: float):
+    self.record(timeout)